@@ -0,0 +1,99 @@
+"""
+Excel I/O benchmark: the streaming openpyxl paths in helper against the previous in-memory paths.
+
+Usage: python benchmarks/excel_io.py [--rows 100000] [--cols 10] [--json FILE]
+
+The previous paths are reproduced here: pandas.read_excel + replace + tolist for reading, and a
+regular openpyxl Workbook filled with one ws.cell() call per cell for writing.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from helper import read_excel_file, write_excel_file
+from sheet_model import SheetModel
+
+
+def legacy_read(file_name):
+    df = pd.read_excel(file_name, header=None)
+    df = df.replace({np.nan: None})
+    return df.values.tolist()
+
+
+def legacy_write(file_name, data):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row_index, row_data in enumerate(data, start=1):
+        for col_index, cell_value in enumerate(row_data, start=1):
+            ws.cell(row=row_index, column=col_index, value=cell_value)
+    wb.save(file_name)
+
+
+def build_model(rows, cols):
+    """
+    Builds a sheet of mixed numbers and text.
+
+    :param rows: The number of rows.
+    :param cols: The number of columns.
+    :return: The SheetModel.
+    """
+    numbers = np.round(np.random.default_rng(0).random((rows, cols)) * 1000, 2).tolist()
+    return SheetModel.from_data([["item " + str(i) if j % 3 == 2 else number for j, number in enumerate(row)]
+                                 for i, row in enumerate(numbers)])
+
+
+def measure(function, *args):
+    """
+    Runs a function twice: once to measure its time, then under tracemalloc for its peak Python memory.
+
+    :return: A tuple (seconds, peak bytes).
+    """
+    start = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the streaming and legacy Excel I/O paths.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    model = build_model(args.rows, args.cols)
+    rows = model.to_list()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        streaming_file = os.path.join(directory, "streaming.xlsx")
+        legacy_file = os.path.join(directory, "legacy.xlsx")
+        results["write_streaming"] = measure(write_excel_file, streaming_file, model)
+        results["write_legacy"] = measure(legacy_write, legacy_file, rows)
+        results["read_streaming"] = measure(read_excel_file, streaming_file)
+        results["read_legacy"] = measure(legacy_read, streaming_file)
+
+    print(f"{args.rows} rows x {args.cols} columns")
+    for name, (seconds, peak) in results.items():
+        print(f"{name:16} {seconds:8.3f}s  peak {peak / 2 ** 20:8.1f} MiB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: {"seconds": seconds, "peak_bytes": peak}
+                       for name, (seconds, peak) in results.items()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
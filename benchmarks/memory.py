@@ -0,0 +1,67 @@
+"""
+Memory benchmark: bytes held per populated cell by the sheet model on realistic sheets.
+
+Usage: python benchmarks/memory.py [--rows 100000] [--json FILE]
+
+Three sheets are measured: a dense numeric table, a mostly-empty sheet with a few scattered
+values, and a mixed sheet of numbers, text, formulas and styled cells.
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from coordinates import cell_name
+from sheet_model import SheetModel
+
+
+def dense_sheet(rows):
+    return SheetModel.from_data(np.round(np.random.default_rng(0).random((rows, 10)) * 1000, 2).tolist())
+
+
+def sparse_sheet(rows):
+    model = SheetModel(rows, 200)
+    rng = np.random.default_rng(1)
+    for k in range(rows // 10):
+        i, j = int(rng.integers(rows)), int(rng.integers(200))
+        model.set_text(i, j, str(k) if k % 2 else "note " + str(k))
+    return model
+
+
+def mixed_sheet(rows):
+    model = SheetModel(rows, 8)
+    bold = model.style_table.derive(0, weight="bold")
+    for i in range(rows):
+        model.set_text(i, 0, "item " + str(i))
+        model.set_text(i, 1, str(i % 97))
+        model.set_text(i, 2, str(i * 0.25))
+        if i % 10 == 0:
+            model.set_function(i, 3, "SUM(" + cell_name(i, 1) + ":" + cell_name(i, 2) + ")")
+            model.set_style(i, 0, bold)
+    model.recalculate_all()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the memory held by the sheet model.")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--json", help="write the reports to this file")
+    args = parser.parse_args()
+
+    reports = {name: build(args.rows).memory_report()
+               for name, build in (("dense", dense_sheet), ("sparse", sparse_sheet), ("mixed", mixed_sheet))}
+    for name, report in reports.items():
+        print(f"{name:8} {report['cells']:>10} cells  {report['populated_cells']:>9} populated  "
+              f"{report['array_columns']:>4} array / {report['sparse_columns']:>4} sparse columns  {report['total_bytes'] / 2 ** 20:8.1f} MiB  "
+              f"{report['bytes_per_populated_cell']:8.1f} bytes/populated cell")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup-time benchmark: time from `python main.py` to the first drawn frame.
+
+Usage: python benchmarks/startup.py [--runs N] [--json FILE]
+
+The GUI measurement needs a display. The import time of the GUI modules (workbook, which pulls in
+helper) is measured as well and works headless, so it can run in CI to catch heavy imports at startup.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_command(command):
+    """
+    Runs a command from the repository root and measures its wall time.
+
+    :param command: The command line, as a list.
+    :return: A tuple (seconds, stdout).
+    """
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the startup time of the spreadsheet application.")
+    parser.add_argument("--runs", type=int, default=5, help="the number of runs of each measurement")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = {"import_workbook": [time_command([sys.executable, "-c", "import workbook"])[0]
+                                   for _ in range(args.runs)]}
+    try:
+        first_frame = []
+        process_total = []
+        for _ in range(args.runs):
+            seconds, output = time_command([sys.executable, "main.py", "--startup-benchmark"])
+            process_total.append(seconds)
+            first_frame.append(float(re.search(r"first frame: ([\d.]+)s", output).group(1)))
+        results["first_frame"] = first_frame
+        results["process_to_first_frame"] = process_total
+    except (subprocess.CalledProcessError, AttributeError) as error:
+        print(f"skipping the GUI measurement (no display?): {error}", file=sys.stderr)
+
+    for name, samples in results.items():
+        print(f"{name:24} min {min(samples):.3f}s  median {statistics.median(samples):.3f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
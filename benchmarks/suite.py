@@ -0,0 +1,184 @@
+"""
+Microbenchmark suite for the hot paths of helper: formula evaluation, coordinate conversion,
+fill-drag formula shifting and every file reader and writer.
+
+Usage: python benchmarks/suite.py [--sizes 1000,100000] [--filter TEXT] [--json FILE]
+                                  [--baseline FILE] [--save-baseline [FILE]] [--threshold 0.2]
+
+Each benchmark reports the best time of several runs (seconds per call for the microbenchmarks,
+seconds per file for I/O, where a run slower than SLOW_RUN seconds is not repeated). Every result is
+then compared with the one stored in the baseline (benchmarks/baseline.json unless --baseline is given),
+and the command exits with status 1 if any benchmark is slower than the baseline by more than the threshold.
+Baselines are machine-specific (their python and machine fields tell where they were recorded); run with
+--save-baseline to record a new one on the machine that compares against it.
+The 1M-cell files are opt-in (--sizes 1000,100000,1000000): that run takes over an hour on a single CPU,
+mostly in the PDF reader, and the committed baseline has no results to compare it with.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from formula import CompiledFormula
+from coordinates import cell_name
+from helper import FILE_FORMATS, solve_expression, get_next_function, number_to_excel_column, _excel_to_indices
+from sheet_model import SheetModel
+
+COLUMNS = 10
+IO_SIZES = "1000,100000"
+SLOW_RUN = 2.0
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+FORMULAS = {
+    "small": "A1 + B2 * 2",
+    "wide": "SUM(" + ", ".join(cell_name(i, j) for i in range(10) for j in (0, 1, 3, 4, 6)) + ")",
+    "nested": "MIN(" * 8 + "A1" + "".join(", " + cell_name(k, 1) + " + 1)" for k in range(8)),
+    "range": "SUM(A1:J100) / AVERAGE(B1:B100)",
+}
+
+
+def build_model(rows, cols=COLUMNS):
+    """
+    Builds a sheet of mixed numbers and text.
+
+    :param rows: The number of rows.
+    :param cols: The number of columns.
+    :return: The SheetModel.
+    """
+    numbers = np.round(np.random.default_rng(0).random((rows, cols)) * 1000, 2).tolist()
+    return SheetModel.from_data([["item" + str(i) if j % 3 == 2 else number for j, number in enumerate(row)]
+                                 for i, row in enumerate(numbers)])
+
+
+def best_time(function, *args):
+    """
+    Measures the best time of one call of a fast function.
+
+    :return: The time of one call in seconds.
+    """
+    timer = timeit.Timer(lambda: function(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def best_run(function, *args, runs=3):
+    """
+    Measures the best time of a slow function over a few runs, or a single one if it takes over SLOW_RUN seconds.
+
+    :return: The time of one call in seconds.
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+        if times[-1] > SLOW_RUN:
+            break
+    return min(times)
+
+
+def micro_benchmarks():
+    """
+    Yields the microbenchmarks as (name, function, args) tuples.
+    """
+    model = build_model(100)
+    rows = model.to_list()
+    for kind, formula in FORMULAS.items():
+        yield "solve_expression." + kind, solve_expression, (formula, model)
+        yield "compile_formula." + kind, CompiledFormula, (formula,)
+    yield "solve_expression.small_list", solve_expression, (FORMULAS["small"], rows)
+    yield "get_next_function", get_next_function, ("SUM(A1:B3) + C4 * AB12",)
+    yield "number_to_excel_column", lambda: [number_to_excel_column(n) for n in range(1, 1001)], ()
+    yield "_excel_to_indices", lambda: [_excel_to_indices(name) for name in ("A1", "Z99", "AB123", "XFD1048576")], ()
+
+
+def io_benchmarks(sizes, directory):
+    """
+    Yields the file reader and writer benchmarks as (name, function, args) tuples, for each registered format.
+
+    :param sizes: The numbers of cells of the benchmarked files.
+    :param directory: The directory the files are written to.
+    """
+    for cells in sizes:
+        model = build_model(max(cells // COLUMNS, 1))
+        for extension, file_format in FILE_FORMATS.items():
+            file_name = os.path.join(directory, str(cells) + "." + extension)
+            yield f"write.{extension}.{cells}", file_format.writer, (file_name, model)
+            yield f"read.{extension}.{cells}", file_format.reader, (file_name,)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results with a baseline.
+
+    :param results: The benchmark results, name -> seconds.
+    :param baseline: The baseline results, name -> seconds.
+    :param threshold: The relative slowdown reported as a regression (0.2 for 20%).
+    :return: The names of the regressed benchmarks.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        change = seconds / reference - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:36} {seconds:12.6f}s  baseline {reference:12.6f}s  {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the microbenchmark suite.")
+    parser.add_argument("--sizes", default=IO_SIZES, help="comma-separated numbers of cells of the I/O benchmarks")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains this text")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="compare the results with this file (as written by --save-baseline)")
+    parser.add_argument("--save-baseline", nargs="?", const=BASELINE,
+                        help="write the results to this file (benchmarks/baseline.json if omitted) as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="the slowdown reported as a regression")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, function, function_args in micro_benchmarks():
+            if args.filter in name:
+                results[name] = best_time(function, *function_args)
+                print(f"{name:36} {results[name] * 1e6:12.2f}us")
+        for name, function, function_args in io_benchmarks(sizes, directory):
+            if args.filter in name:
+                results[name] = best_run(function, *function_args)
+                print(f"{name:36} {results[name]:12.3f}s")
+            elif name.startswith("write.") and args.filter in "read." + name.split(".", 1)[1]:
+                # The file is still needed by the read benchmark
+                function(*function_args)
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    for file_name in (args.json, args.save_baseline):
+        if file_name:
+            with open(file_name, "w") as f:
+                json.dump(report, f, indent=2)
+    if not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
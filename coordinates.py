@@ -0,0 +1,139 @@
+import re
+import threading
+from functools import lru_cache
+
+# Column labels are cached up to this index (Excel's last column, XFD); larger indices are converted directly
+LABEL_TABLE_MAX = 16384
+
+_REFERENCE_PATTERN = re.compile(r'([A-Za-z]+)([0-9]+)')
+_R1C1_PATTERN = re.compile(r'[Rr]([0-9]+)[Cc]([0-9]+)')
+
+_labels = []
+_labels_lock = threading.Lock()
+
+
+def _letters(index):
+    """
+    Converts a zero-based column index to column letters, without the label table.
+
+    :param index: The zero-based column index.
+    :return: The column letters (e.g., "AB").
+    """
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _grow_labels(size):
+    """
+    Extends the label table to at least a number of columns, doubling its size.
+
+    :param size: The number of labels needed.
+    :return: None
+    """
+    with _labels_lock:
+        target = min(max(size, 2 * len(_labels), 256), LABEL_TABLE_MAX)
+        _labels.extend(_letters(index) for index in range(len(_labels), target))
+
+
+def column_label(index):
+    """
+    Converts a zero-based column index to its column letters.
+
+    :param index: The zero-based column index.
+    :return: The column letters (e.g., "AB"), or an empty string for a negative index.
+    """
+    if index < 0:
+        return ""
+    if index >= len(_labels):
+        if index >= LABEL_TABLE_MAX:
+            return _letters(index)
+        _grow_labels(index + 1)
+    return _labels[index]
+
+
+def column_index(letters):
+    """
+    Converts column letters to a zero-based column index.
+
+    :param letters: The column letters, in any case (e.g., "AB").
+    :return: The zero-based column index.
+    """
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def cell_name(row, column):
+    """
+    Converts row and column indices to an A1-style cell reference.
+
+    :param row: The row index.
+    :param column: The column index.
+    :return: The cell reference (e.g., "A1").
+    """
+    return column_label(column) + str(row + 1)
+
+
+@lru_cache(maxsize=65536)
+def parse_reference(reference):
+    """
+    Converts an A1-style cell reference to row and column indices.
+
+    :param reference: The cell reference, in any case (e.g., "A1" or "ab12").
+    :return: A tuple (row, column) of zero-based indices.
+    :raise ValueError: If the text is not a cell reference.
+    """
+    match = _REFERENCE_PATTERN.fullmatch(reference)
+    if not match or int(match.group(2)) == 0:
+        raise ValueError("Invalid cell reference " + reference)
+    return int(match.group(2)) - 1, column_index(match.group(1))
+
+
+def r1c1_name(row, column):
+    """
+    Converts row and column indices to an R1C1-style cell reference.
+
+    :param row: The row index.
+    :param column: The column index.
+    :return: The cell reference (e.g., "R1C1").
+    """
+    return "R" + str(row + 1) + "C" + str(column + 1)
+
+
+def parse_r1c1(reference):
+    """
+    Converts an R1C1-style cell reference to row and column indices.
+
+    :param reference: The cell reference, in any case (e.g., "R1C1").
+    :return: A tuple (row, column) of zero-based indices.
+    :raise ValueError: If the text is not an R1C1 cell reference.
+    """
+    match = _R1C1_PATTERN.fullmatch(reference)
+    if not match or int(match.group(1)) == 0 or int(match.group(2)) == 0:
+        raise ValueError("Invalid R1C1 cell reference " + reference)
+    return int(match.group(1)) - 1, int(match.group(2)) - 1
+
+
+def to_r1c1(reference):
+    """
+    Converts an A1-style cell reference to the R1C1 style.
+
+    :param reference: The A1-style cell reference (e.g., "B3").
+    :return: The R1C1-style cell reference (e.g., "R3C2").
+    """
+    return r1c1_name(*parse_reference(reference))
+
+
+def to_a1(reference):
+    """
+    Converts an R1C1-style cell reference to the A1 style.
+
+    :param reference: The R1C1-style cell reference (e.g., "R3C2").
+    :return: The A1-style cell reference (e.g., "B3").
+    """
+    return cell_name(*parse_r1c1(reference))
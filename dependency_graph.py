@@ -0,0 +1,194 @@
+from collections import deque
+from formula import compile_formula, FormulaError
+
+# Ranges of at most this many cells are stored as one edge per cell, like single references
+SMALL_RANGE = 64
+
+
+class DependencyGraph:
+    """
+    A class representing the precedents/dependents graph of the formulas in a sheet.
+
+    Cells are identified by (row, column) index tuples. Single references and small ranges are stored
+    as edges; larger range references (A1:B100) are stored once per formula and indexed by column,
+    so a large range does not add one edge per cell.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty DependencyGraph object.
+        """
+        self.precedents = {}
+        self.dependents = {}
+        self.ranges = {}
+        self.column_ranges = {}
+
+    def set_formula(self, cell, function):
+        """
+        Registers (or replaces) the formula of a cell and the cells it references.
+
+        :param cell: The (row, column) of the formula cell.
+        :param function: The formula text.
+        :return: None
+        """
+        self.remove_formula(cell)
+        try:
+            compiled = compile_formula(function)
+        except FormulaError:
+            references, ranges = [], []
+        else:
+            references, ranges = compiled.references, compiled.ranges
+        precedents = set(references)
+        large_ranges = []
+        for first_row, first_column, last_row, last_column in ranges:
+            if (last_row - first_row + 1) * (last_column - first_column + 1) <= SMALL_RANGE:
+                precedents.update((row, column) for row in range(first_row, last_row + 1)
+                                  for column in range(first_column, last_column + 1))
+            else:
+                large_ranges.append((first_row, first_column, last_row, last_column))
+        self.precedents[cell] = precedents
+        for reference in precedents:
+            self.dependents.setdefault(reference, set()).add(cell)
+        if large_ranges:
+            self.ranges[cell] = large_ranges
+            for first_row, first_column, last_row, last_column in large_ranges:
+                for column in range(first_column, last_column + 1):
+                    self.column_ranges.setdefault(column, set()).add(cell)
+
+    def remove_formula(self, cell):
+        """
+        Removes the formula of a cell from the graph.
+
+        :param cell: The (row, column) of the formula cell.
+        :return: None
+        """
+        for reference in self.precedents.pop(cell, ()):
+            dependents = self.dependents.get(reference)
+            if dependents is not None:
+                dependents.discard(cell)
+                if not dependents:
+                    del self.dependents[reference]
+        for first_row, first_column, last_row, last_column in self.ranges.pop(cell, ()):
+            for column in range(first_column, last_column + 1):
+                formulas = self.column_ranges.get(column)
+                if formulas is not None:
+                    formulas.discard(cell)
+                    if not formulas:
+                        del self.column_ranges[column]
+
+    def clear(self):
+        """
+        Removes every formula from the graph.
+
+        :return: None
+        """
+        self.precedents.clear()
+        self.dependents.clear()
+        self.ranges.clear()
+        self.column_ranges.clear()
+
+    def direct_dependents(self, cell):
+        """
+        Collects the formulas that reference a cell, either directly or through a range.
+
+        :param cell: The (row, column) of the cell.
+        :return: A set of formula cells.
+        """
+        dependents = set(self.dependents.get(cell, ()))
+        row, column = cell
+        for formula_cell in self.column_ranges.get(column, ()):
+            for first_row, first_column, last_row, last_column in self.ranges[formula_cell]:
+                if first_row <= row <= last_row and first_column <= column <= last_column:
+                    dependents.add(formula_cell)
+                    break
+        return dependents
+
+    def dependents_order(self, *cells, formulas=()):
+        """
+        Collects the transitive dependents of one or more cells in the order they must be recalculated.
+
+        :param cells: The (row, column) of the changed cells.
+        :param formulas: Formula cells to recalculate themselves (e.g. just submitted), along with their dependents.
+        :return: A tuple (order, cyclic): the dependents in topological order,
+                 and the dependents that are part of (or fed by) a reference cycle.
+        """
+        affected = {cell for cell in formulas if cell in self.precedents}
+        edges = {}
+        queue = deque(cells + tuple(formulas))
+        while queue:
+            node = queue.popleft()
+            if node in edges:
+                continue
+            edges[node] = self.direct_dependents(node)
+            for dependent in edges[node]:
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        return self._topological_order(affected, edges)
+
+    def formulas_order(self):
+        """
+        Orders every formula of the sheet so that each one comes after the formulas it references.
+
+        :return: A tuple (order, cyclic) as returned by dependents_order.
+        """
+        formulas = set(self.precedents)
+        edges = {node: self.direct_dependents(node) & formulas for node in formulas}
+        return self._topological_order(formulas, edges)
+
+    def formulas_levels(self):
+        """
+        Splits every formula of the sheet into levels: each formula only references formulas of earlier levels,
+        so the formulas of a level are independent of each other.
+
+        :return: A tuple (levels, cyclic): a list of lists of formula cells, and the formulas that are
+                 part of (or fed by) a reference cycle.
+        """
+        formulas = set(self.precedents)
+        edges = {node: self.direct_dependents(node) & formulas for node in formulas}
+        in_degree = {node: 0 for node in formulas}
+        for node in formulas:
+            for dependent in edges[node]:
+                in_degree[dependent] += 1
+
+        level = sorted(node for node, degree in in_degree.items() if degree == 0)
+        levels = []
+        while level:
+            levels.append(level)
+            next_level = []
+            for node in level:
+                for dependent in edges[node]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_level.append(dependent)
+            level = sorted(next_level)
+
+        cyclic = [node for node, degree in in_degree.items() if degree > 0]
+        return levels, cyclic
+
+    @staticmethod
+    def _topological_order(affected, edges):
+        """
+        Sorts a set of formula cells with Kahn's algorithm.
+
+        :param affected: The formula cells to sort.
+        :param edges: The dependents of each cell in affected (all of them in affected).
+        :return: A tuple (order, cyclic).
+        """
+        in_degree = {node: 0 for node in affected}
+        for node in affected:
+            for dependent in edges[node]:
+                in_degree[dependent] += 1
+
+        ready = deque(sorted(node for node, degree in in_degree.items() if degree == 0))
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for dependent in edges[node]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
+
+        cyclic = [node for node, degree in in_degree.items() if degree > 0]
+        return order, cyclic
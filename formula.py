@@ -0,0 +1,614 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+from coordinates import cell_name, parse_reference
+
+
+class FormulaError(ValueError):
+    """
+    Raised when a formula can't be tokenized or parsed.
+    """
+
+
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<error>\#REF!)
+      | (?P<ref>[A-Za-z]+\d+)
+      | (?P<name>[A-Za-z_]+)
+      | (?P<op>\*\*|//|<=|>=|==|!=|<>|[-+*/%^<>=])
+      | (?P<punct>[(),:])
+    )""", re.VERBOSE)
+
+_CRITERION_PATTERN = re.compile(r'\s*(<=|>=|<>|!=|==|=|<|>)?\s*(.*?)\s*')
+
+_CRITERION_OPERATORS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+                        "=": np.equal, "==": np.equal, "<>": np.not_equal, "!=": np.not_equal}
+
+# Functions whose bare cell arguments are read like one-cell ranges, so that empty and text cells are skipped
+# (AVERAGE(B2) behaves like AVERAGE(B2:B2))
+_RANGE_ARGUMENT_FUNCTIONS = ("AVERAGE", "AVG")
+
+_COMPARISONS = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "==": "==", "=": "==", "!=": "!=", "<>": "!="}
+
+
+def tokenize(formula):
+    """
+    Splits a formula into (kind, text) tokens.
+
+    :param formula: The formula text.
+    :return: A list of tokens, where kind is one of number, string, error (#REF!), ref, name, op or punct.
+    """
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = _TOKEN_PATTERN.match(formula, position)
+        if not match:
+            raise FormulaError("Unexpected character at position " + str(position) + ": " + formula[position:])
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+    return tokens
+
+
+@lru_cache(maxsize=256)
+def formula_template(formula, lenient=False):
+    """
+    Splits a formula into the text around its cell references and the references themselves,
+    so that it can be moved to other cells without being tokenized again.
+
+    :param formula: The formula text.
+    :param lenient: If True, characters that can't be tokenized and invalid references are kept as text
+                    instead of raising a FormulaError.
+    :return: A tuple (parts, references): the text between the references (one more part than references),
+             and the (row, column) of each reference.
+    """
+    parts = []
+    references = []
+    position = last = 0
+    while position < len(formula):
+        match = _TOKEN_PATTERN.match(formula, position)
+        if not match:
+            if formula[position:].isspace():
+                break
+            if lenient:
+                position += 1
+                continue
+            raise FormulaError("Unexpected character at position " + str(position) + ": " + formula[position:])
+        if match.lastgroup == "ref":
+            start, end = match.span("ref")
+            try:
+                references.append(parse_reference(match.group("ref")))
+            except ValueError as error:
+                if not lenient:
+                    raise FormulaError(str(error))
+            else:
+                parts.append(formula[last:start])
+                last = end
+        position = match.end()
+    parts.append(formula[last:])
+    return tuple(parts), tuple(references)
+
+
+def shift_formula(formula, row_offset, column_offset):
+    """
+    Moves the cell references of a formula by an offset, as when the formula is filled into another cell.
+
+    Formulas that can't be tokenized (which show Error) are shifted too, their other text being kept as it is.
+
+    :param formula: The formula text.
+    :param row_offset: The number of rows to move the references down (negative to move them up).
+    :param column_offset: The number of columns to move the references right (negative to move them left).
+    :return: The shifted formula.
+    :raise FormulaError: If a reference moves above the first row or left of the first column.
+    """
+    parts, references = formula_template(formula, lenient=True)
+    pieces = [parts[0]]
+    for (row, column), part in zip(references, parts[1:]):
+        row += row_offset
+        column += column_offset
+        if row < 0 or column < 0:
+            raise FormulaError("A reference of " + formula + " moves outside the sheet")
+        pieces.append(cell_name(row, column))
+        pieces.append(part)
+    return "".join(pieces)
+
+
+def move_references(formula, axis, index, count):
+    """
+    Rewrites the cell references of a formula after rows or columns were inserted into or deleted from the sheet.
+
+    References after the insertion point move by count; references to deleted cells become #REF! (so the formula
+    fails), and ranges shrink to the cells that are left, or become #REF! if all of their cells were deleted.
+    Formulas that can't be tokenized (which show Error) are rewritten too, their other text being kept as it is.
+
+    :param formula: The formula text.
+    :param axis: 0 for rows, 1 for columns.
+    :param index: The index of the first inserted or deleted row or column.
+    :param count: The number of inserted rows or columns, or minus the number of deleted ones.
+    :return: The rewritten formula (formula itself if none of its references moved).
+    """
+    parts, references = formula_template(formula, lenient=True)
+    if all(reference[axis] < index for reference in references):
+        return formula
+    end = index - count
+
+    def moved(position, last):
+        if position < index:
+            return position
+        if count > 0 or position >= end:
+            return position + count
+        return index - 1 if last else index
+
+    pieces = [parts[0]]
+    k = 0
+    while k < len(references):
+        if k + 1 < len(references) and parts[k + 1].strip() == ":":
+            first, last = references[k], references[k + 1]
+            low, high = sorted((first[axis], last[axis]))
+            low, high = moved(low, False), moved(high, True)
+            if low > high:
+                pieces.append("#REF!")
+            else:
+                ends = [list(first), list(last)]
+                ends[first[axis] > last[axis]][axis] = low
+                ends[first[axis] <= last[axis]][axis] = high
+                pieces.append(cell_name(*ends[0]) + parts[k + 1] + cell_name(*ends[1]))
+            pieces.append(parts[k + 2])
+            k += 2
+            continue
+        reference = list(references[k])
+        if count < 0 and index <= reference[axis] < end:
+            pieces.append("#REF!")
+        else:
+            reference[axis] = moved(reference[axis], False)
+            pieces.append(cell_name(*reference))
+        pieces.append(parts[k + 1])
+        k += 1
+    return "".join(pieces)
+
+
+def cell_value(text):
+    """
+    Converts the text of a cell to the value a formula sees.
+
+    :param text: The text of the cell.
+    :return: An int or float for numeric text, a bool for TRUE/FALSE, 0 for an empty cell, otherwise the text.
+    """
+    if text is None or text == "":
+        return 0
+    if not isinstance(text, str):
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    if text.upper() in ("TRUE", "FALSE"):
+        return text.upper() == "TRUE"
+    return text
+
+
+def numeric_value(text):
+    """
+    Converts the text of a cell to the number a range sees.
+
+    :param text: The text of the cell.
+    :return: The number as a float, or NaN for empty, text and boolean cells.
+    """
+    value = cell_value(text)
+    if text is None or text == "" or isinstance(value, bool) or not isinstance(value, (int, float)):
+        return math.nan
+    return float(value)
+
+
+# ####################################### Functions ####################################### #
+
+def _has_range(args):
+    return any(isinstance(arg, np.ndarray) for arg in args)
+
+
+def _range_numbers(args):
+    """
+    Collects the arguments of an aggregate function into one flat array of numbers.
+
+    Ranges are 2-D float arrays where empty and text cells are NaN; those cells are skipped.
+
+    :param args: The scalar and range arguments.
+    :return: A 1-D float array.
+    """
+    parts = [np.ravel(arg) if isinstance(arg, np.ndarray) else np.array([arg], dtype=float) for arg in args]
+    numbers = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return numbers[~np.isnan(numbers)]
+
+
+def _scalar(number):
+    number = float(number)
+    if number.is_integer():
+        return int(number)
+    return number
+
+
+def _average(*args):
+    if _has_range(args):
+        numbers = _range_numbers(args)
+        if not len(numbers):
+            raise ZeroDivisionError("AVERAGE of a range without numbers")
+        return float(numbers.sum() / len(numbers))
+    return sum(args) / len(args)
+
+
+def _sum(*args):
+    if len(args) == 1 and isinstance(args[0], np.ndarray):
+        return _scalar(np.nansum(args[0]))
+    if _has_range(args):
+        return _scalar(_range_numbers(args).sum())
+    return sum(args)
+
+
+def _min(*args):
+    if _has_range(args):
+        return _scalar(_range_numbers(args).min())
+    return min(args)
+
+
+def _max(*args):
+    if _has_range(args):
+        return _scalar(_range_numbers(args).max())
+    return max(args)
+
+
+def _if(*args):
+    if args[0]:
+        return args[1]
+    return args[2]
+
+
+def _sqrt(*args):
+    return math.sqrt(_sum(*args))
+
+
+@lru_cache(maxsize=256)
+def parse_criterion(criterion):
+    """
+    Parses a COUNTIF-style criterion (e.g., ">15", "<>0", "7") into a mask function.
+
+    :param criterion: The criterion text; a bare number means equality.
+    :return: A function taking a float array and returning the boolean array of the numbers that match.
+    """
+    match = _CRITERION_PATTERN.fullmatch(criterion)
+    operator = _CRITERION_OPERATORS[match.group(1) or "="]
+    operand = numeric_value(match.group(2))
+    if math.isnan(operand):
+        raise FormulaError("Invalid criterion " + criterion)
+
+    def mask(numbers):
+        with np.errstate(invalid="ignore"):
+            return operator(numbers, operand) & ~np.isnan(numbers)
+    return mask
+
+
+def _flat_numbers(arg):
+    if isinstance(arg, np.ndarray):
+        return np.ravel(arg)
+    return np.array([numeric_value(arg)], dtype=float)
+
+
+def _criteria_numbers(args):
+    parts = [_flat_numbers(arg) for arg in args]
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def _countif(*args):
+    mask = parse_criterion(str(args[-1]))
+    return int(np.count_nonzero(mask(_criteria_numbers(args[:-1]))))
+
+
+def _selected(values, criterion, targets):
+    values = _flat_numbers(values)
+    targets = values if targets is None else _flat_numbers(targets)
+    if len(targets) != len(values):
+        raise FormulaError("The ranges of a conditional function must have the same size")
+    selected = targets[parse_criterion(str(criterion))(values)]
+    return selected[~np.isnan(selected)]
+
+
+def _sumif(values, criterion, targets=None):
+    return _scalar(_selected(values, criterion, targets).sum())
+
+
+def _averageif(values, criterion, targets=None):
+    selected = _selected(values, criterion, targets)
+    if not len(selected):
+        raise ZeroDivisionError("No cell matches the criterion")
+    return float(selected.mean())
+
+
+FUNCTIONS = {
+    "MIN": _min,
+    "MAX": _max,
+    "SUM": _sum,
+    "AVERAGE": _average,
+    "AVG": _average,
+    "SQRT": _sqrt,
+    "IF": _if,
+    "COUNTIF": _countif,
+    "SUMIF": _sumif,
+    "AVERAGEIF": _averageif,
+    "ABS": abs,
+    "ROUND": round,
+}
+
+
+def _deleted_reference():
+    raise FormulaError("A referenced cell was deleted (#REF!)")
+
+
+# ####################################### Parser ####################################### #
+
+class _Parser:
+    """
+    A recursive-descent parser that translates formula tokens into a Python expression.
+
+    ^ is exponentiation (like **, not Python's XOR) and binds tighter than a unary minus: -2^2 is -4.
+    """
+
+    def __init__(self, tokens):
+        """
+        Initializes a _Parser object.
+
+        :param tokens: The tokens produced by tokenize().
+        """
+        self.tokens = tokens
+        self.position = 0
+        self.references = []
+        self.ranges = []
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def take(self, text=None):
+        kind, value = self.peek()
+        if kind is None or (text is not None and value != text):
+            raise FormulaError("Expected " + (text or "a value") + " but found " + str(value))
+        self.position += 1
+        return kind, value
+
+    def parse(self):
+        source = self.comparison()
+        if self.position != len(self.tokens):
+            raise FormulaError("Unexpected " + str(self.peek()[1]))
+        return source
+
+    def comparison(self):
+        source = self.additive()
+        while self.peek()[1] in _COMPARISONS:
+            operator = _COMPARISONS[self.take()[1]]
+            source += " " + operator + " " + self.additive()
+        return source
+
+    def additive(self):
+        source = self.term()
+        while self.peek()[1] in ("+", "-"):
+            operator = self.take()[1]
+            source = "(" + source + " " + operator + " " + self.term() + ")"
+        return source
+
+    def term(self):
+        source = self.unary()
+        while self.peek()[1] in ("*", "/", "//", "%"):
+            operator = self.take()[1]
+            source = "(" + source + " " + operator + " " + self.unary() + ")"
+        return source
+
+    def unary(self):
+        if self.peek()[1] in ("-", "+"):
+            operator = self.take()[1]
+            return "(" + operator + self.unary() + ")"
+        return self.power()
+
+    def power(self):
+        source = self.primary()
+        if self.peek()[1] in ("**", "^"):
+            self.take()
+            source = "(" + source + " ** " + self.unary() + ")"
+        return source
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "number":
+            return repr(float(value)) if any(c in value for c in ".eE") else repr(int(value))
+        if kind == "string":
+            return repr(value[1:-1])
+        if kind == "ref":
+            if self.peek()[1] == ":":
+                self.take()
+                return self.range(value, self.take()[1])
+            row, column = self.reference(value)
+            return "v(" + str(row) + ", " + str(column) + ")"
+        if kind == "name":
+            return self.call(value.upper())
+        if kind == "error":
+            return "R_DELETED()"
+        if value == "(":
+            source = self.comparison()
+            self.take(")")
+            return "(" + source + ")"
+        raise FormulaError("Unexpected " + value)
+
+    @staticmethod
+    def indices(text):
+        try:
+            return parse_reference(text)
+        except ValueError as error:
+            raise FormulaError(str(error))
+
+    def reference(self, text):
+        row, column = self.indices(text)
+        if (row, column) not in self.references:
+            self.references.append((row, column))
+        return row, column
+
+    def range(self, first, last):
+        (first_row, first_column), (last_row, last_column) = self.indices(first), self.indices(last)
+        area = (min(first_row, last_row), min(first_column, last_column),
+                max(first_row, last_row), max(first_column, last_column))
+        if area not in self.ranges:
+            self.ranges.append(area)
+        return "a(" + ", ".join(str(index) for index in area) + ")"
+
+    def call(self, name):
+        if name in ("TRUE", "FALSE") and self.peek()[1] != "(":
+            return repr(name == "TRUE")
+        if name not in FUNCTIONS:
+            raise FormulaError("Unknown function " + name)
+        self.take("(")
+        arguments = []
+        if self.peek()[1] != ")":
+            arguments.append(self.argument(name))
+            while self.peek()[1] == ",":
+                self.take()
+                arguments.append(self.argument(name))
+        self.take(")")
+        return "F_" + name + "(" + ", ".join(arguments) + ")"
+
+    def argument(self, name):
+        kind, value = self.peek()
+        following = self.tokens[self.position + 1][1] if self.position + 1 < len(self.tokens) else None
+        if name in _RANGE_ARGUMENT_FUNCTIONS and kind == "ref" and following in (",", ")"):
+            self.take()
+            row, column = self.reference(value)
+            return "a(" + ", ".join(str(index) for index in (row, column, row, column)) + ")"
+        return self.comparison()
+
+
+class CompiledFormula:
+    """
+    A class representing a formula compiled once into a Python callable.
+    """
+
+    _NAMESPACE = dict({"F_" + name: function for name, function in FUNCTIONS.items()}, R_DELETED=_deleted_reference)
+
+    def __init__(self, formula):
+        """
+        Initializes a CompiledFormula object.
+
+        :param formula: The formula text.
+        """
+        parser = _Parser(tokenize(formula))
+        self.formula = formula
+        self.python_source = parser.parse()
+        self.references = parser.references
+        self.ranges = parser.ranges
+        code = compile("lambda v, a: " + self.python_source, "<formula>", "eval")
+        self._function = eval(code, dict(CompiledFormula._NAMESPACE))
+
+    def evaluate(self, values):
+        """
+        Evaluates the formula against a source of cell values.
+
+        :param values: An object exposing value(row, column), returning the value of a cell, and
+                       block(first_row, first_column, last_row, last_column), returning a range as a 2-D float array.
+        :return: The result of the formula.
+        :raise FormulaError: If the result is a range instead of a single value.
+        """
+        result = self._function(values.value, values.block)
+        if isinstance(result, np.ndarray):
+            raise FormulaError("A range can only be used as a function argument")
+        return result
+
+
+# ####################################### Cache ####################################### #
+
+class FormulaCache:
+    """
+    A bounded LRU cache of compiled formulas, keyed by formula text.
+
+    The cache is shared by the GUI thread and the background recalculation worker, so lookups are locked.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Initializes a FormulaCache object.
+
+        :param maxsize: The maximum number of compiled formulas kept.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, formula):
+        """
+        Retrieves the compiled form of a formula, compiling it on a miss.
+
+        :param formula: The formula text.
+        :return: The CompiledFormula object.
+        """
+        with self._lock:
+            compiled = self._entries.get(formula)
+            if compiled is not None:
+                self.hits += 1
+                self._entries.move_to_end(formula)
+                return compiled
+            self.misses += 1
+        compiled = CompiledFormula(formula)
+        with self._lock:
+            self._entries[formula] = compiled
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def resize(self, maxsize):
+        """
+        Changes the capacity of the cache, evicting the least recently used entries if needed.
+
+        :param maxsize: The new maximum number of compiled formulas.
+        :return: None
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def hit_rate(self):
+        """
+        Computes the fraction of lookups served from the cache.
+
+        :return: The hit rate between 0 and 1.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Retrieves the cache statistics.
+
+        :return: A dictionary with hits, misses, size, maxsize and hit_rate.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                "maxsize": self.maxsize, "hit_rate": self.hit_rate()}
+
+
+formula_cache = FormulaCache()
+
+
+def compile_formula(formula):
+    """
+    Compiles a formula, reusing the cached compiled form when the same text was seen before.
+
+    :param formula: The formula text.
+    :return: The CompiledFormula object.
+    """
+    return formula_cache.get(formula)
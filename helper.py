@@ -1,41 +1,37 @@
-import math
-import re
 import json
-import numpy as np
-import yaml
-from openpyxl import Workbook
 import csv
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.pdfgen import canvas
-import pandas as pd
-import pdfplumber
+import importlib
+import itertools
+import os
+import struct
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from coordinates import cell_name, column_label, parse_reference
+from formula import compile_formula, cell_value, numeric_value, shift_formula
+from sheet_model import SheetModel
+from profiling import timed
 
 
 def number_to_excel_column(number):
     """
     Converts a number to its corresponding Excel column letter.
 
-    :param number: The number to convert.
+    :param number: The number to convert (1 for column A).
     :return: The Excel column letter corresponding to the number.
     """
-    if number <= 0:
-        return ''
-
-    quotient, remainder = divmod(number - 1, 26)
-    return number_to_excel_column(quotient) + chr(65 + remainder)
+    return column_label(number - 1)
 
 
-def _excel_column_to_number(column_str):
+def indices_to_excel(row, column):
     """
-    Converts an Excel column letter to its corresponding number.
+    Converts row and column indices to an Excel-style cell reference.
 
-    :param column_str: The Excel column letter.
-    :return: The corresponding column number.
+    :param row: The row index.
+    :param column: The column index.
+    :return: The Excel-style cell reference (e.g., "A1").
     """
-    result = 0
-    for i, char in enumerate(reversed(column_str)):
-        result += (ord(char) - 64) * (26 ** i)
-    return result
+    return cell_name(row, column)
 
 
 def _excel_to_indices(excel_str):
@@ -45,143 +41,92 @@ def _excel_to_indices(excel_str):
     :param excel_str: The Excel-style cell reference (e.g., "A1").
     :return: A tuple containing the row index and column index.
     """
-    column_str = ''.join(filter(str.isalpha, excel_str))
-    row_str = ''.join(filter(str.isdigit, excel_str))
-
-    column_index = _excel_column_to_number(column_str) - 1
-
-    row_index = int(row_str) - 1
-
-    return row_index, column_index
+    return parse_reference(excel_str)
 
 
-def _find_letter_number_indices(expression):
+class _ListValues:
     """
-    Finds letter-number pairs (cell references) in a given expression.
-
-    :param expression: The expression to search.
-    :return: A list of tuples containing the start and end indices of cell references in the expression.
+    Adapts a list of lists of cell text to the value source expected by compiled formulas.
     """
-    pattern = re.compile(r'[a-zA-Z]+\d+')
-    matches = pattern.finditer(expression)
-    indices = [(match.start(), match.end() - 1) for match in matches]
-    return indices
 
+    def __init__(self, sheet_values):
+        """
+        Initializes a _ListValues object.
 
-def _replace_coord_names(expression, indices, sheet_values):
-    """
-    Replaces cell coordinates in an expression with corresponding values from a sheet.
+        :param sheet_values: The values of cells in the sheet.
+        """
+        self.sheet_values = sheet_values
 
-    :param expression: The expression containing cell coordinates.
-    :param indices: A list of tuples containing the start and end indices of cell references.
-    :param sheet_values: The values of cells in the sheet.
-    :return: The expression with cell coordinates replaced by values.
-    """
-    new_expression = list(expression)
-    offset = 0
+    def value(self, row, column):
+        """
+        Retrieves the value of a cell.
 
-    for first, last in indices:
-        coord_name = expression[first:last + 1]
-        i, j = _excel_to_indices(coord_name)
-        replacement_value = sheet_values[i][j]
-        new_expression[first + offset:last + 1 + offset] = list(replacement_value)
-        offset += len(replacement_value) - (last - first + 1)
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The value of the cell.
+        """
+        return cell_value(self.sheet_values[row][column])
 
-    new_expression = ''.join(new_expression)
-    return new_expression
+    def block(self, first_row, first_column, last_row, last_column):
+        """
+        Retrieves the numbers of a range of cells.
 
+        :param first_row: The first row index of the range.
+        :param first_column: The first column index of the range.
+        :param last_row: The last row index of the range (inclusive).
+        :param last_column: The last column index of the range (inclusive).
+        :return: A 2-D float array, with NaN for empty and text cells.
+        """
+        return np.array([[numeric_value(text) for text in row[first_column:last_column + 1]]
+                         for row in self.sheet_values[first_row:last_row + 1]], dtype=float)
 
+
+@timed("solve_expression")
 def solve_expression(expression, sheet_values):
     """
     Solves a mathematical expression with cell references.
 
+    The expression is compiled once and cached by its text, so repeated evaluations skip parsing.
+
     :param expression: The mathematical expression to solve.
-    :param sheet_values: The values of cells in the sheet.
+    :param sheet_values: The values of cells in the sheet, as a SheetModel or a list of lists of cell text.
     :return: The result of the expression evaluation.
     """
-    def average(*args):
-        return sum(args) / len(args)
-
-    def sum_(*args):
-        return sum(args)
+    if not hasattr(sheet_values, "value"):
+        sheet_values = _ListValues(sheet_values)
+    return compile_formula(expression).evaluate(sheet_values)
 
-    def if_(*args):
-        if args[0]:
-            return args[1]
-        return args[2]
 
-    def sqrt(*args):
-        return math.sqrt(sum(args))
-
-    def countif_(*args):
-        count = 0
-        for i in range(len(args) - 1):
-            if eval(str(args[i]) + args[-1]):
-                count += 1
-        return count
-
-    expression = expression.upper().replace(" ", "")
-    indices = _find_letter_number_indices(expression)
-    expression = _replace_coord_names(expression, indices, sheet_values)
-    sum_replace = expression.lower().replace("sum", "sum_")
-    if_replace = sum_replace.replace("if", "if_")
-    return eval(if_replace)
-
-def _next_letter(input_letters):
+def get_next_function(function):
     """
-    Generates the next Excel column letter given a sequence of letters.
+    Generates the next function with updated cell coordinates (the function filled one column to the right).
 
-    :param input_letters: The input letters.
-    :return: The next Excel column letter.
+    :param function: The current function containing cell coordinates.
+    :return: The next function with updated cell coordinates.
     """
-    carry = 1
-    result = []
+    return shift_formula(function, 0, 1)
 
-    for letter in input_letters[::-1]:
-        value = ord(letter) - ord('A') + carry
-        carry = value // 26
-        result.append(chr((value % 26) + ord('A')))
 
-    if carry:
-        result.append('A')
-
-    return ''.join(result[::-1])
+# ####################################### Save/Open Files ####################################### #
 
+_backend_modules = {}
 
-def _replace_coords_names(function, indices):
-    """
-    Replaces cell coordinates in a function with the next column letters.
 
-    :param function: The function containing cell coordinates.
-    :param indices: A list of tuples containing the start and end indices of cell references.
-    :return: The function with cell coordinates replaced by the next column letters.
+def load_backend(module_name):
     """
-    new_expression = list(function)
-    offset = 0
-    for first, last in indices:
-        coord_name = function[first:last + 1]
-        column_str = ''.join(filter(str.isalpha, coord_name))
-        row_str = ''.join(filter(str.isdigit, coord_name))
-        letter = _next_letter(column_str)
-        new_coord_name = letter+row_str
-        new_expression[first + offset:last + 1 + offset] = list(new_coord_name)
-        offset += len(new_coord_name) - (last - first + 1)
-    new_expression = ''.join(new_expression)
-    return new_expression
+    Imports the module behind a file format the first time that format is used.
 
+    yaml, pandas, openpyxl, reportlab and pdfplumber are slow to import, so they are not loaded at startup.
 
-def get_next_function(function):
-    """
-    Generates the next function with updated cell coordinates.
-
-    :param function: The current function containing cell coordinates.
-    :return: The next function with updated cell coordinates.
+    :param module_name: The name of the module (e.g., "openpyxl").
+    :return: The imported module.
     """
-    indices = _find_letter_number_indices(function)
-    return _replace_coords_names(function, indices)
-
+    module = _backend_modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+        _backend_modules[module_name] = module
+    return module
 
-# ####################################### Save/Open Files ####################################### #
 
 def read_json_file(file_name):
     """
@@ -203,10 +148,33 @@ def read_yaml_file(file_name):
     :return: The data read from the YAML file.
     """
     with open(file_name) as f:
-        data = yaml.safe_load(f)
+        data = load_backend("yaml").safe_load(f)
     return data
 
 
+EXCEL_CHUNK_SIZE = 5000
+
+
+def iter_excel_file(file_name, chunk_size=EXCEL_CHUNK_SIZE):
+    """
+    Reads data from an Excel file in chunks of rows, using openpyxl's streaming read-only mode.
+
+    :param file_name: The path to the Excel file.
+    :param chunk_size: The number of rows per chunk.
+    :return: A generator of lists of rows of typed values (numbers, strings, None for empty cells).
+    """
+    wb = load_backend("openpyxl").load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        while True:
+            chunk = [list(row) for row in itertools.islice(rows, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        wb.close()
+
+
 def read_excel_file(file_name):
     """
     Reads data from a Excel file.
@@ -214,12 +182,32 @@ def read_excel_file(file_name):
     :param file_name: The path to the Excel file.
     :return: The data read from the Excel file.
     """
-    df = pd.read_excel(file_name, header=None)
-    df = df.replace({np.nan: None})
-    data = df.values.tolist()
+    data = []
+    for chunk in iter_excel_file(file_name):
+        data.extend(chunk)
     return data
 
 
+CSV_CHUNK_SIZE = 5000
+
+
+def iter_csv_file(file_name, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Reads data from a CSV file in chunks of rows, so the file never has to be held in memory at once.
+
+    :param file_name: The path to the CSV file.
+    :param chunk_size: The number of rows per chunk.
+    :return: A generator of lists of rows, with None for empty fields.
+    """
+    with open(file_name, newline='') as f:
+        reader = csv.reader(f)
+        while True:
+            chunk = [[field if field != "" else None for field in row] for row in itertools.islice(reader, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
 def read_csv_file(file_name):
     """
     Reads data from a CSV file.
@@ -227,23 +215,39 @@ def read_csv_file(file_name):
     :param file_name: The path to the CSV file.
     :return: The data read from the CSV file.
     """
-    df = pd.read_csv(file_name, header=None)
-    df = df.replace({np.nan: None})
-    data = df.values.tolist()
+    data = []
+    for chunk in iter_csv_file(file_name):
+        data.extend(chunk)
     return data
 
 
-def read_pdf_file(file_name):
+PDF_PAGES_PER_TASK = 8
+PDF_CELL_WIDTH = 80
+PDF_CELL_HEIGHT = 20
+PDF_MARGIN = 36
+PDF_HEADER_GRAY = 0.5
+# Only the headers of PDF files written by write_pdf_file (which sets this creator) are skipped on import
+PDF_CREATOR = "Python-Based-Spreadsheet-App"
+
+
+def _extract_pdf_rows(file_name, first_page, last_page):
     """
-    Reads data from a PDF file.
+    Extracts the rows of a range of pages of a PDF file (runs in a worker process).
 
     :param file_name: The path to the PDF file.
-    :return: The data read from the PDF file.
-    """
-    with pdfplumber.open(file_name) as pdf:
-        data = []
-        for page in pdf.pages:
-            page_text = page.extract_text()
+    :param first_page: The index of the first page.
+    :param last_page: The index after the last page.
+    :return: The rows of the pages, in order.
+    """
+    data = []
+    with load_backend("pdfplumber").open(file_name) as pdf:
+        headers = pdf.metadata.get("Creator") == PDF_CREATOR
+        for page in pdf.pages[first_page:last_page]:
+            if headers:
+                # The row numbers and column letters repeated on each page by write_pdf_file are gray
+                page = page.filter(lambda obj: obj.get("non_stroking_color") not in ((PDF_HEADER_GRAY,),
+                                                                                      [PDF_HEADER_GRAY]))
+            page_text = page.extract_text() or ""
             lines = page_text.split("\n")
             lines = [line.strip() for line in lines if line.strip()]
             rows = [[None if field == 'None' else field for field in line.split()] for line in lines]
@@ -251,16 +255,64 @@ def read_pdf_file(file_name):
     return data
 
 
+def iter_pdf_file(file_name, workers=None, progress=None, pages_per_task=PDF_PAGES_PER_TASK):
+    """
+    Reads data from a PDF file, extracting page ranges in parallel in a process pool.
+
+    Chunks are yielded in page order as soon as a range and all the ranges before it are done.
+
+    :param file_name: The path to the PDF file.
+    :param workers: The number of worker processes (None for one per CPU, 1 to extract in this process).
+    :param progress: An optional callback called with (pages done, page count) after each chunk.
+    :param pages_per_task: The number of pages extracted by one task.
+    :return: A generator of lists of rows.
+    """
+    with load_backend("pdfplumber").open(file_name) as pdf:
+        page_count = len(pdf.pages)
+    ranges = [(first, min(first + pages_per_task, page_count)) for first in range(0, page_count, pages_per_task)]
+    if workers == 1 or len(ranges) <= 1:
+        results = (_extract_pdf_rows(file_name, first, last) for first, last in ranges)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        futures = [executor.submit(_extract_pdf_rows, file_name, first, last) for first, last in ranges]
+        results = (future.result() for future in futures)
+    try:
+        for (first, last), rows in zip(ranges, results):
+            if progress:
+                progress(last, page_count)
+            if rows:
+                yield rows
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def read_pdf_file(file_name, workers=None, progress=None):
+    """
+    Reads data from a PDF file.
+
+    :param file_name: The path to the PDF file.
+    :param workers: The number of worker processes (None for one per CPU).
+    :param progress: An optional callback called with (pages done, page count).
+    :return: The data read from the PDF file.
+    """
+    data = []
+    for chunk in iter_pdf_file(file_name, workers, progress):
+        data.extend(chunk)
+    return data
+
+
 def write_yaml_file(file_name, data):
     """
     Writes workbook data to a YAML file.
 
     :param file_name: The name of the YAML file to write.
-    :param data: The workbook data to be written.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
     :return: None
     """
     with open(file_name, 'w') as f:
-        yaml.dump(data, f)
+        load_backend("yaml").dump(list(data), f)
 
 
 def write_json_file(file_name, data):
@@ -268,26 +320,28 @@ def write_json_file(file_name, data):
     Writes workbook data to a JSON file.
 
     :param file_name: The name of the JSON file to write.
-    :param data: The workbook data to be written.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
     :return: None
     """
     with open(file_name, 'w') as f:
-        json.dump(data, f)
+        json.dump(list(data), f)
 
 
 def write_excel_file(file_name, data):
     """
     Writes workbook data to an Excel file.
 
+    Uses openpyxl's streaming write-only mode: rows are appended as they are pulled from the model,
+    with numbers written as numbers and text as strings.
+
     :param file_name: The name of the Excel file to write.
-    :param data: The workbook data to be written.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
     :return: None
     """
-    wb = Workbook()
-    ws = wb.active
-    for row_index, row_data in enumerate(data, start=1):
-        for col_index, cell_value in enumerate(row_data, start=1):
-            ws.cell(row=row_index, column=col_index, value=cell_value)
+    wb = load_backend("openpyxl").Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for row in SheetModel.from_data(data).iter_values():
+        ws.append(row)
     wb.save(file_name)
 
 
@@ -295,8 +349,10 @@ def write_csv_file(file_name, data):
     """
     Writes workbook data to a CSV file.
 
+    Rows are pulled from data one at a time, so a SheetModel is never converted to a full matrix.
+
     :param file_name: The name of the CSV file to write.
-    :param data: The workbook data to be written.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
     :return: None
     """
     with open(file_name, 'w', newline='') as csvfile:
@@ -306,20 +362,203 @@ def write_csv_file(file_name, data):
 
 def write_pdf_file(file_name, data):
     """
-    Writes workbook data to a PDF file.
+    Writes workbook data to a PDF file, one page per tile of rows and columns.
+
+    Rows are pulled from data one page at a time, and the row numbers and column letters are repeated
+    on every page (in gray, and the file is marked with PDF_CREATOR, so that read_pdf_file can skip them).
 
     :param file_name: The name of the PDF file to write.
-    :param data: The workbook data to be written.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
     :return: None
     """
-    c = canvas.Canvas(file_name, pagesize=landscape(letter))
-    cell_width = 50
-    cell_height = 20
-    for i, row in enumerate(data):
-        for j, cell in enumerate(row):
-            x = 50 + j * cell_width
-            y = 550 - (i * cell_height)
-            c.drawString(x, y, str(cell))
+    pagesizes = load_backend("reportlab.lib.pagesizes")
+    canvas = load_backend("reportlab.pdfgen.canvas")
+    page_width, page_height = pagesizes.landscape(pagesizes.letter)
+    c = canvas.Canvas(file_name, pagesize=(page_width, page_height))
+    c.setCreator(PDF_CREATOR)
+    rows_per_page = int((page_height - 2 * PDF_MARGIN) // PDF_CELL_HEIGHT) - 1
+    columns_per_page = int((page_width - 2 * PDF_MARGIN) // PDF_CELL_WIDTH) - 1
+    top = page_height - PDF_MARGIN - PDF_CELL_HEIGHT
+    rows = iter(data)
+    first_row = 0
+    while True:
+        band = [list(row) for row in itertools.islice(rows, rows_per_page)]
+        if not band:
+            break
+        width = max(len(row) for row in band)
+        # Each band of rows is split into tiles of columns, each tile on its own page with the headers repeated
+        for first_column in range(0, max(width, 1), columns_per_page):
+            last_column = min(first_column + columns_per_page, width)
+            c.setFillGray(PDF_HEADER_GRAY)
+            for k, j in enumerate(range(first_column, last_column), 1):
+                c.drawString(PDF_MARGIN + k * PDF_CELL_WIDTH, top + PDF_CELL_HEIGHT, column_label(j))
+            labels = c.beginText(PDF_MARGIN, top)
+            labels.setLeading(PDF_CELL_HEIGHT)
+            for i in range(first_row, first_row + len(band)):
+                labels.textLine(str(i + 1))
+            c.drawText(labels)
+            c.setFillGray(0)
+            for k, j in enumerate(range(first_column, last_column), 1):
+                text = c.beginText(PDF_MARGIN + k * PDF_CELL_WIDTH, top)
+                text.setLeading(PDF_CELL_HEIGHT)
+                for row in band:
+                    text.textLine(str(row[j]) if j < len(row) and row[j] is not None else "")
+                c.drawText(text)
+            c.showPage()
+        first_row += len(band)
     c.save()
 
 
+# Native binary format: a header, the numbers as raw float64 columns (one after the other, so each
+# column can be mapped with np.memmap), then a string table of (row, column, kind, length, UTF-8 bytes)
+# records holding the text, formulas and styles of the cells.
+NATIVE_MAGIC = b"SSWB"
+NATIVE_VERSION = 1
+_NATIVE_HEADER = struct.Struct("<4sHHIIQQ")
+_NATIVE_RECORD = struct.Struct("<IIBI")
+_NATIVE_ALIGNMENT = 64
+_TEXT, _FUNCTION, _STYLE = 0, 1, 2
+
+
+def read_native_file(file_name):
+    """
+    Opens a native binary workbook file.
+
+    The numbers are memory-mapped copy-on-write, so only the pages of the cells actually read
+    (e.g., the visible rows) are loaded from disk, and edits never write back to the file.
+
+    :param file_name: The path to the native file.
+    :return: The SheetModel of the workbook.
+    """
+    with open(file_name, 'rb') as f:
+        magic, version, flags, rows, cols, numbers_offset, table_offset = _NATIVE_HEADER.unpack(
+            f.read(_NATIVE_HEADER.size))
+        if magic != NATIVE_MAGIC or version != NATIVE_VERSION:
+            raise ValueError("Not a native workbook file: " + file_name)
+        f.seek(table_offset)
+        count, = struct.unpack("<Q", f.read(8))
+        records = []
+        for _ in range(count):
+            row, column, kind, length = _NATIVE_RECORD.unpack(f.read(_NATIVE_RECORD.size))
+            records.append((row, column, kind, f.read(length).decode("utf-8")))
+
+    model = SheetModel(0, 0)
+    model.rows, model.cols, model.capacity = rows, cols, rows
+    if rows and cols:
+        numbers = np.memmap(file_name, dtype="<f8", mode="c", offset=numbers_offset, shape=(cols, rows))
+        model.columns = list(numbers)
+    else:
+        model.columns = [None] * cols
+    for row, column, kind, text in records:
+        if kind == _TEXT:
+            model.text[(row, column)] = text
+        elif kind == _FUNCTION:
+            model.set_function(row, column, text)
+        elif kind == _STYLE:
+            model.set_style(row, column, model.style_table.intern(json.loads(text)))
+    return model
+
+
+def write_native_file(file_name, data):
+    """
+    Writes workbook data to a native binary workbook file.
+
+    The file is written under a temporary name and then moved over file_name, so a workbook opened
+    from file_name (whose numbers are still memory-mapped from it) can be saved back to the same path.
+
+    :param file_name: The name of the native file to write.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
+    :return: None
+    """
+    model = SheetModel.from_data(data)
+    numbers_offset = -(-_NATIVE_HEADER.size // _NATIVE_ALIGNMENT) * _NATIVE_ALIGNMENT
+    table_offset = numbers_offset + model.rows * model.cols * 8
+    records = [(row, column, _TEXT, text) for (row, column), text in model.text.items()]
+    records += [(row, column, _FUNCTION, function) for (row, column), function in model.functions.items()]
+    records += [(row, column, _STYLE, json.dumps(model.style_table.get(style)._asdict()))
+                for (row, column), style in model.styles.items()]
+    temporary_name = file_name + ".tmp"
+    try:
+        with open(temporary_name, 'wb') as f:
+            f.write(_NATIVE_HEADER.pack(NATIVE_MAGIC, NATIVE_VERSION, 0, model.rows, model.cols,
+                                        numbers_offset, table_offset))
+            f.write(bytes(numbers_offset - _NATIVE_HEADER.size))
+            for j in range(model.cols):
+                np.ascontiguousarray(model.column_numbers(j), dtype="<f8").tofile(f)
+            f.write(struct.pack("<Q", len(records)))
+            for row, column, kind, text in records:
+                encoded = text.encode("utf-8")
+                f.write(_NATIVE_RECORD.pack(row, column, kind, len(encoded)))
+                f.write(encoded)
+        os.replace(temporary_name, file_name)
+    except BaseException:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+        raise
+
+
+FileFormat = namedtuple("FileFormat", ["description", "reader", "writer", "chunk_reader"])
+
+FILE_FORMATS = {
+    "json": FileFormat("JSON files", read_json_file, write_json_file, None),
+    "yaml": FileFormat("YAML files", read_yaml_file, write_yaml_file, None),
+    "xlsx": FileFormat("Excel files", read_excel_file, write_excel_file, iter_excel_file),
+    "csv": FileFormat("CSV files", read_csv_file, write_csv_file, iter_csv_file),
+    "pdf": FileFormat("PDF files", read_pdf_file, write_pdf_file, iter_pdf_file),
+    "ssb": FileFormat("Spreadsheet binary files", read_native_file, write_native_file, None),
+}
+
+
+def get_filetypes():
+    """
+    Retrieves the file types of the registered formats, as expected by the tkinter file dialogs.
+
+    :return: A tuple of (description, pattern) pairs.
+    """
+    return tuple((file_format.description, "*." + name) for name, file_format in FILE_FORMATS.items())
+
+
+def get_file_format(file_name):
+    """
+    Retrieves the registered format of a file from its extension.
+
+    :param file_name: The path to the file.
+    :return: The FileFormat of the file.
+    """
+    file_type = get_file_type(file_name)
+    if file_type not in FILE_FORMATS:
+        raise ValueError("Unsupported file format: " + file_type)
+    return FILE_FORMATS[file_type]
+
+
+def get_file_type(file_name):
+    """
+    Retrieves the format of a file from its extension.
+
+    :param file_name: The path to the file.
+    :return: The lower-case extension (e.g., "json").
+    """
+    return file_name.rsplit(".", 1)[-1].lower()
+
+
+@timed("read_file")
+def read_file(file_name):
+    """
+    Reads workbook data from a file, choosing the reader by the file extension.
+
+    :param file_name: The path to the file.
+    :return: The data read from the file.
+    """
+    return get_file_format(file_name).reader(file_name)
+
+
+@timed("write_file")
+def write_file(file_name, data):
+    """
+    Writes workbook data to a file, choosing the writer by the file extension.
+
+    :param file_name: The path to the file.
+    :param data: The workbook data to be written (a SheetModel or a list of rows).
+    :return: None
+    """
+    get_file_format(file_name).writer(file_name, data)
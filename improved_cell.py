@@ -1,76 +1,103 @@
 import tkinter as tk
-from helper import number_to_excel_column
-from tkinter import font
+from coordinates import cell_name
+from styles import StyleTable
 
 
 class ImprovedCell:
     """
     A class representing an improved cell in a spreadsheet.
+
+    The sheet keeps a small pool of these widgets for the visible part of the sheet, and rebinds
+    them to other sheet cells (bind_to) as the sheet is scrolled.
+    The style of the cell is an ID in the StyleTable of the sheet, whose fonts are shared by all the cells.
     """
 
-    def __init__(self, root, i, j):
+    __slots__ = ("entry", "row", "column", "coord_name", "style_table", "style_id")
+
+    def __init__(self, root, i, j, style_table):
         """
         Initializes an ImprovedCell object.
 
         :param root: The root tkinter object.
         :param i: The row index of the cell.
         :param j: The column index of the cell.
+        :param style_table: The StyleTable of the sheet.
         """
         self.entry = tk.Entry(root)
+        self.bind_to(i, j)
+        self.style_table = style_table
+        self.style_id = None
+        self.set_style(StyleTable.DEFAULT)
+
+    def bind_to(self, i, j):
+        """
+        Binds the widget to a cell of the sheet.
+
+        :param i: The row index of the cell.
+        :param j: The column index of the cell.
+        :return: None
+        """
         self.row = i
         self.column = j
-        self.coord_name = number_to_excel_column(j+1) + str(i + 1)
-        self.function = None
-        self.undo_stack = []
-        self.redo_stack = []
-        self.undo_redo_extension()
-        self.font = font.Font(family="Arial", size=6)
+        self.coord_name = cell_name(i, j)
 
-    def set_font(self, font_, size):
+    def set_text(self, text):
         """
-        Sets the font of the cell.
+        Replaces the text shown in the cell.
 
-        :param font_: The name of the font family.
-        :param size: The font size.
+        :param text: The new text.
         :return: None
         """
-        self.font = font.Font(family=font_, size=size)
-        self.entry['font'] = self.font
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, text)
 
-    def get_font(self):
+    def get_style(self):
         """
-        Retrieves the font of the cell.
+        Retrieves the style of the cell.
 
-        :return: The font object.
+        :return: The style ID of the cell.
         """
-        return self.font
+        return self.style_id
 
-    def set_function(self, function):
+    def set_style(self, style_id):
         """
-        Sets a function for the cell.
+        Applies a style (font, colors and alignment) to the cell.
 
-        :param function: The function to be set.
+        :param style_id: The style ID in the style table.
         :return: None
         """
-        self.function = function
+        if style_id == self.style_id:
+            return
+        style = self.style_table.get(style_id)
+        self.entry.configure(font=self.style_table.font(style_id), fg=style.fg, bg=style.bg, justify=style.justify)
+        self.style_id = style_id
 
-    def clear_function(self):
+    def update_style(self, **changes):
+        """
+        Switches the cell to the style that differs from its current one by some fields.
+
+        :param changes: The fields to change (e.g. weight="bold").
+        :return: None
         """
-        Clears the function associated with the cell.
+        self.set_style(self.style_table.derive(self.style_id, **changes))
 
+    def set_font(self, font_, size):
+        """
+        Sets the font of the cell.
+
+        :param font_: The name of the font family.
+        :param size: The font size.
         :return: None
         """
-        self.function = None
+        self.update_style(family=font_, size=int(size))
 
-    def get_function(self):
+    def get_font(self):
         """
-        Retrieves the function associated with the cell.
+        Retrieves the font of the cell.
 
-        :return: The function associated with the cell, or an empty string if no function is set.
+        :return: The font object (shared with the other cells of the same font).
         """
-        if self.function:
-            return self.function
-        return ""
+        return self.style_table.font(self.style_id)
 
     def get_cell(self):
         """
@@ -88,57 +115,6 @@ class ImprovedCell:
         """
         return self.coord_name
 
-    def undo_redo_extension(self):
-        """
-        Binds events for undo and redo functionalities.
-
-        :return: None
-        """
-        self.entry.bind("<Key>", self.on_change)
-        self.entry.old_value = ""
-        self.entry.bind("<Control-z>", self.undo)
-        self.entry.bind("<Control-y>", self.redo)
-
-    def on_change(self, event=None):
-        """
-        Triggered when the content of the cell changes.
-
-        :param event: The event that triggered the change.
-        :return: None
-        """
-        new_value = self.entry.get()
-        if new_value != self.entry.old_value:
-            self.undo_stack.append(self.entry.old_value)
-            self.entry.old_value = new_value
-
-    def undo(self, event=None):
-        """
-        Undoes the last change made to the cell.
-
-        :param event: The event that triggered the undo action.
-        :return: None
-        """
-        if self.undo_stack:
-            current_text = self.undo_stack.pop()
-            self.redo_stack.append(self.entry.old_value)
-            self.entry.old_value = current_text
-            self.entry.delete(0, tk.END)
-            self.entry.insert(0, current_text)
-
-    def redo(self, event=None):
-        """
-        Redoes the last undone change made to the cell.
-
-        :param event: The event that triggered the redo action.
-        :return: None
-        """
-        if self.redo_stack:
-            current_text = self.redo_stack.pop()
-            self.undo_stack.append(self.entry.old_value)
-            self.entry.old_value = current_text
-            self.entry.delete(0, tk.END)
-            self.entry.insert(0, current_text)
-
     def change_font(self, font_):
         """
         Changes the font of the cell.
@@ -146,8 +122,7 @@ class ImprovedCell:
         :param font_: The name of the font family.
         :return: None
         """
-        self.font.configure(family=font_)
-        self.entry.config(font=self.font)
+        self.update_style(family=font_)
 
     def change_font_size(self, font_size):
         """
@@ -156,8 +131,7 @@ class ImprovedCell:
         :param font_size: The size of the font.
         :return: None
         """
-        self.font.configure(size=font_size)
-        self.entry.config(font=self.font)
+        self.update_style(size=int(font_size))
 
     def font_customize(self, function):
         """
@@ -166,21 +140,22 @@ class ImprovedCell:
         :param function: The type of font customization to apply.
         :return: None
         """
+        style = self.style_table.get(self.style_id)
         if function == "bold":
-            if self.font.cget("weight") == "normal":
-                self.font.configure(weight="bold")
+            if style.weight == "normal":
+                self.update_style(weight="bold")
             else:
-                self.font.configure(weight="normal")
+                self.update_style(weight="normal")
         elif function == "italic":
-            if self.font.cget("slant") == "roman":
-                self.font.configure(slant="italic")
+            if style.slant == "roman":
+                self.update_style(slant="italic")
             else:
-                self.font.configure(slant="roman")
+                self.update_style(slant="roman")
         elif function == "under":
-            if self.font.cget("underline"):
-                self.font.configure(underline=False)
+            if style.underline:
+                self.update_style(underline=0)
             else:
-                self.font.configure(underline=True)
+                self.update_style(underline=1)
 
     def color_customize(self, change, color):
         """
@@ -191,9 +166,9 @@ class ImprovedCell:
         :return: None
         """
         if change == "text":
-            self.entry.configure(fg=color)
+            self.update_style(fg=color)
         elif change == "entry":
-            self.entry.configure(bg=color)
+            self.update_style(bg=color)
 
     def align(self, position):
         """
@@ -202,4 +177,4 @@ class ImprovedCell:
         :param position: The alignment position (left, center, or right).
         :return: None
         """
-        self.entry.configure(justify=position)
+        self.update_style(justify=position)
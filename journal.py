@@ -0,0 +1,229 @@
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+JOURNAL_MAX_BYTES = 4 * 2 ** 20
+COALESCE_SECONDS = 1.0
+
+
+class JournalEntry:
+    """
+    A class representing one undoable step: the changes it made, as (row, column, kind, old, new) tuples.
+    """
+
+    __slots__ = ("label", "changes", "size", "time", "typing")
+
+    def __init__(self, label, typing=False):
+        """
+        Initializes an empty JournalEntry object.
+
+        :param label: A short description of the step (e.g. "typing", "fill").
+        :param typing: Whether the step is a run of typing that later keystrokes may be merged into.
+        """
+        self.label = label
+        self.changes = []
+        self.size = sys.getsizeof(self) + sys.getsizeof(self.changes)
+        self.time = time.monotonic()
+        self.typing = typing
+
+    def add(self, change):
+        """
+        Adds a change to the entry.
+
+        :param change: A (row, column, kind, old, new) tuple.
+        :return: None
+        """
+        self.changes.append(change)
+        self.size += _change_size(change) + 8
+
+
+def _change_size(change):
+    """
+    Estimates the memory held by a change.
+
+    :param change: A (row, column, kind, old, new) tuple.
+    :return: The size in bytes.
+    """
+    return sys.getsizeof(change) + _value_size(change[3]) + _value_size(change[4])
+
+
+def _value_size(value):
+    """
+    Estimates the memory held by the old or new value of a change, including the cells removed by a deletion
+    of rows or columns (a (size, removed) tuple whose removed dictionaries hold the cells).
+
+    :param value: The value.
+    :return: The size in bytes.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(_value_size(item) for item in value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + _value_size(item)
+    return size
+
+
+class Journal:
+    """
+    A class representing the undo/redo history of a workbook.
+
+    Each entry only stores the cells it changed, with their old and new values. Consecutive keystrokes
+    in the same cell are merged into one entry, bulk operations are grouped into a single entry with
+    transaction(), and the oldest entries are evicted when the history grows past max_bytes.
+    """
+
+    def __init__(self, max_bytes=JOURNAL_MAX_BYTES, coalesce_seconds=COALESCE_SECONDS):
+        """
+        Initializes an empty Journal object.
+
+        :param max_bytes: The memory cap of the undo history.
+        :param coalesce_seconds: The longest pause between two keystrokes merged into the same entry.
+        """
+        self.max_bytes = max_bytes
+        self.coalesce_seconds = coalesce_seconds
+        self.undo_entries = deque()
+        self.redo_entries = []
+        self.size = 0
+        self.evicted = 0
+        self.current = None
+        self.depth = 0
+
+    def record(self, row, column, kind, old, new, typing=False):
+        """
+        Records the change of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param kind: What changed: "text", "function" or "style", or "rows" or "columns" for rows or columns
+                     inserted or deleted at row or column (the values being the sizes of the sheet).
+        :param old: The value before the change.
+        :param new: The value after the change.
+        :param typing: Whether the change is a keystroke, to be merged with the previous keystrokes in the cell.
+        :return: None
+        """
+        if old == new:
+            return
+        change = (row, column, kind, old, new)
+        if self.current is not None:
+            self.current.add(change)
+            return
+        last = self.undo_entries[-1] if self.undo_entries else None
+        now = time.monotonic()
+        if (typing and last is not None and last.typing and now - last.time <= self.coalesce_seconds
+                and last.changes[0][:3] == change[:3]):
+            self.redo_entries.clear()
+            merged = last.changes[0][:4] + (new,)
+            self.size -= last.size
+            last.size += _change_size(merged) - _change_size(last.changes[0])
+            last.changes[0] = merged
+            last.time = now
+            self.size += last.size
+            return
+        entry = JournalEntry("typing" if typing else kind, typing)
+        entry.add(change)
+        self.push(entry)
+
+    def begin(self, label):
+        """
+        Starts a transaction: the changes recorded until the matching commit form a single entry.
+
+        Transactions may be nested; only the outermost one creates an entry.
+
+        :param label: A short description of the operation.
+        :return: None
+        """
+        if self.depth == 0:
+            self.current = JournalEntry(label)
+        self.depth += 1
+
+    def commit(self):
+        """
+        Ends a transaction started with begin.
+
+        :return: None
+        """
+        self.depth -= 1
+        if self.depth == 0:
+            entry, self.current = self.current, None
+            if entry.changes:
+                self.push(entry)
+
+    @contextmanager
+    def transaction(self, label):
+        """
+        Groups the changes recorded in a with block into a single entry.
+
+        :param label: A short description of the operation.
+        """
+        self.begin(label)
+        try:
+            yield self
+        finally:
+            self.commit()
+
+    def seal(self):
+        """
+        Stops merging keystrokes into the last entry (e.g. when another cell gets the focus).
+
+        :return: None
+        """
+        if self.undo_entries:
+            self.undo_entries[-1].typing = False
+
+    def push(self, entry):
+        """
+        Adds an entry to the history, clearing the redo history and evicting the oldest entries over the memory cap.
+
+        :param entry: The JournalEntry to add.
+        :return: None
+        """
+        self.redo_entries.clear()
+        self.undo_entries.append(entry)
+        self.size += entry.size
+        while self.size > self.max_bytes and len(self.undo_entries) > 1:
+            self.size -= self.undo_entries.popleft().size
+            self.evicted += 1
+
+    def undo(self):
+        """
+        Takes the last entry out of the undo history.
+
+        :return: The (row, column, kind, value) changes that restore the cells, in the order to apply them,
+                 or an empty list if there is nothing to undo.
+        """
+        if not self.undo_entries or self.current is not None:
+            return []
+        entry = self.undo_entries.pop()
+        entry.typing = False
+        self.size -= entry.size
+        self.redo_entries.append(entry)
+        return [(row, column, kind, old) for row, column, kind, old, new in reversed(entry.changes)]
+
+    def redo(self):
+        """
+        Takes the last undone entry back into the undo history.
+
+        :return: The (row, column, kind, value) changes that redo the entry, in the order to apply them,
+                 or an empty list if there is nothing to redo.
+        """
+        if not self.redo_entries or self.current is not None:
+            return []
+        entry = self.redo_entries.pop()
+        self.undo_entries.append(entry)
+        self.size += entry.size
+        return [(row, column, kind, new) for row, column, kind, old, new in entry.changes]
+
+    def clear(self):
+        """
+        Discards the whole history.
+
+        :return: None
+        """
+        self.undo_entries.clear()
+        self.redo_entries.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self.undo_entries)
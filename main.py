@@ -1,5 +1,9 @@
+import time
+START_TIME = time.perf_counter()
+
 import argparse
-from spreadsheet import Spreadsheet
+import os
+import sys
 
 
 def parse_arguments():
@@ -9,18 +13,124 @@ def parse_arguments():
     and saving your work in different file formats like JSON, YAML, Excel, CSV, and PDF.
     """
     parser = argparse.ArgumentParser(description=description)
-    return parser.parse_args()
+    parser.add_argument("--startup-benchmark", action="store_true",
+                        help="print the time until the first frame is drawn, then exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="count and time the hot paths, show them in a panel, and write them to a file on exit")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="the file --profile writes to (JSON, or cProfile statistics for a .prof file; "
+                             "default: profile.json); implies --profile")
+    subparsers = parser.add_subparsers(dest="command")
+    recalc = subparsers.add_parser(
+        "recalc", help="recalculate the formulas of spreadsheet files without starting the GUI",
+        description="Loads each file, recalculates the cells starting with '=' as formulas and writes the result.")
+    recalc.add_argument("files", nargs="+", help="the files to recalculate (json, yaml, xlsx, csv, pdf or ssb)")
+    recalc.add_argument("--out", help="the output file (only with a single input file)")
+    recalc.add_argument("--out-dir", help="the directory to write the output files to")
+    recalc.add_argument("--format", help="the output format (default: the format of each input file)")
+    recalc.add_argument("--workers", type=int, default=1,
+                        help="the number of processes evaluating independent formulas in parallel (0: one per CPU)")
+    args = parser.parse_args()
+    if args.command == "recalc" and args.out and len(args.files) > 1:
+        parser.error("--out can only be used with a single input file")
+    if args.profile_out:
+        args.profile = True
+    elif args.profile:
+        args.profile_out = "profile.json"
+    return args
+
+
+def get_output_path(file_name, args):
+    """
+    Computes where the recalculated copy of a file is written.
+
+    :param file_name: The path to the input file.
+    :param args: The parsed command line arguments.
+    :return: The path to the output file.
+    """
+    if args.out:
+        return args.out
+    stem, extension = os.path.splitext(os.path.basename(file_name))
+    extension = "." + args.format if args.format else extension
+    directory = args.out_dir if args.out_dir else os.path.dirname(file_name)
+    if not args.out_dir:
+        stem += ".recalc"
+    return os.path.join(directory, stem + extension)
+
+
+def recalc(args):
+    """
+    Recalculates spreadsheet files headlessly and prints the timing of each one.
+
+    :param args: The parsed command line arguments.
+    :return: The process exit code.
+    """
+    from helper import read_file, write_file
+    from sheet_model import SheetModel
+    from formula import formula_cache
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    exit_code = 0
+    for file_name in args.files:
+        try:
+            start = time.perf_counter()
+            model = SheetModel.from_data(read_file(file_name) or [[]])
+            loaded = time.perf_counter()
+            model.load_formulas()
+            formulas = len(model.functions)
+            failed = model.recalculate_all(workers=args.workers or None)
+            calculated = time.perf_counter()
+            output_path = get_output_path(file_name, args)
+            write_file(output_path, model)
+            written = time.perf_counter()
+        except Exception as error:
+            print(f"{file_name}: failed ({error})", file=sys.stderr)
+            exit_code = 1
+            continue
+        print(f"{file_name}: {model.rows}x{model.cols} cells, {formulas} formulas ({failed} errors) -> "
+              f"{output_path} | read {loaded - start:.3f}s, recalc {calculated - loaded:.3f}s, "
+              f"write {written - calculated:.3f}s, total {written - start:.3f}s")
+    print(f"formula cache hit rate: {formula_cache.hit_rate():.1%}")
+    return exit_code
+
+
+def report_first_frame(root):
+    """
+    Prints the time from startup to the first drawn frame and closes the application.
+
+    :param root: The root tkinter object.
+    :return: None
+    """
+    root.update()
+    print(f"first frame: {time.perf_counter() - START_TIME:.3f}s")
+    root.destroy()
 
 
 def main():
-    parse_arguments()
+    args = parse_arguments()
+    if args.profile:
+        import profiling
+        profiling.enable(cprofile=args.profile_out.endswith(".prof"))
+    try:
+        if args.command == "recalc":
+            sys.exit(recalc(args))
+
+        from spreadsheet import Spreadsheet
 
-    # Start a new spreadsheet application
-    spreadsheet = Spreadsheet()
-    spreadsheet.start_spreadsheet()
+        # Start a new spreadsheet application
+        spreadsheet = Spreadsheet()
+        if args.profile:
+            from profile_panel import ProfilePanel
+            ProfilePanel(spreadsheet.root)
+        if args.startup_benchmark:
+            spreadsheet.root.after(0, report_first_frame, spreadsheet.root)
+        spreadsheet.start_spreadsheet()
+    finally:
+        if args.profile:
+            profiling.dump(args.profile_out)
+            print(f"profile written to {args.profile_out}")
 
 
 if __name__ == '__main__':
     main()
-
-
@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from formula import compile_formula, cell_value
+
+# Levels smaller than this are evaluated in the calling process, where they are not worth the round trip
+PARALLEL_MIN_LEVEL = 256
+CHUNKS_PER_WORKER = 4
+
+# The sheet as seen by a worker process, set up once per process by _init_worker
+_worker = {}
+
+
+class _SharedValues:
+    """
+    A class representing the values of a sheet in a worker process, as read by compiled formulas.
+
+    Numbers come from the shared memory block of the referenced columns; text comes from the text of the
+    sheet when the pool started, overridden by the results of the formulas of the earlier levels.
+    It mirrors SheetModel.value and SheetModel.block, so formulas evaluate exactly as in the sheet.
+    """
+
+    def __init__(self, overrides):
+        """
+        Initializes a _SharedValues object.
+
+        :param overrides: The text of the formula cells computed since the pool started (None for numbers).
+        """
+        self.rows = _worker["rows"]
+        self.cols = _worker["cols"]
+        self.numbers = _worker["numbers"]
+        self.slots = _worker["slots"]
+        self.text = _worker["text"]
+        self.overrides = overrides
+
+    def column_numbers(self, column, first_row, last_row):
+        slot = self.slots.get(column)
+        if slot is None:
+            return np.full(max(last_row - first_row, 0), np.nan)
+        return self.numbers[slot, first_row:last_row]
+
+    def value(self, row, column):
+        if not (0 <= row < self.rows and 0 <= column < self.cols):
+            raise IndexError("Cell (" + str(row) + ", " + str(column) + ") is outside the sheet")
+        key = (row, column)
+        text = self.overrides[key] if key in self.overrides else self.text.get(key)
+        if text is not None:
+            return cell_value(text)
+        number = float(self.column_numbers(column, row, row + 1)[0])
+        if np.isnan(number):
+            return 0
+        if number.is_integer():
+            return int(number)
+        return number
+
+    def block(self, first_row, first_column, last_row, last_column):
+        last_row = min(last_row, self.rows - 1) + 1
+        columns = range(first_column, min(last_column, self.cols - 1) + 1)
+        if len(columns) == 1:
+            return self.column_numbers(first_column, first_row, last_row)[:, None]
+        if not columns:
+            return np.empty((0, 0))
+        return np.column_stack([self.column_numbers(j, first_row, last_row) for j in columns])
+
+
+def _init_worker(name, shape, slots, rows, cols, text):
+    """
+    Attaches a worker process to the shared memory block of the sheet.
+
+    :return: None
+    """
+    block = shared_memory.SharedMemory(name=name)
+    _worker.update(block=block, numbers=np.ndarray(shape, dtype=np.float64, buffer=block.buf),
+                   slots=slots, rows=rows, cols=cols, text=text)
+
+
+def _evaluate_cells(cells, overrides):
+    """
+    Evaluates independent formulas in a worker process.
+
+    :param cells: A list of (row, column, formula) tuples.
+    :param overrides: The text of the formula cells the formulas reference that were computed since the pool started.
+    :return: A list of (row, column, text, evaluated) tuples, text being "Error" when the formula failed.
+    """
+    values = _SharedValues(overrides)
+    results = []
+    for row, column, function in cells:
+        try:
+            solution = compile_formula(function).evaluate(values)
+        except Exception:
+            results.append((row, column, "Error", False))
+        else:
+            results.append((row, column, str(solution), True))
+    return results
+
+
+def _referenced_columns(model):
+    """
+    Collects the columns the formulas of a sheet read.
+
+    :param model: The SheetModel.
+    :return: A sorted list of column indices.
+    """
+    columns = set()
+    for references in model.graph.precedents.values():
+        columns.update(column for row, column in references)
+    for ranges in model.graph.ranges.values():
+        for first_row, first_column, last_row, last_column in ranges:
+            columns.update(range(first_column, min(last_column, model.cols - 1) + 1))
+    return sorted(column for column in columns if 0 <= column < model.cols)
+
+
+def recalculate_parallel(model, workers=None):
+    """
+    Recalculates every formula of a sheet with a pool of worker processes, one dependency level at a time.
+
+    The formulas of a level only reference formulas of earlier levels, so they are split into chunks evaluated
+    in parallel. The columns the formulas read are shared with the workers through shared memory, and the
+    results of each level are written back to it before the next level starts. The results are the same
+    as SheetModel.recalculate_all.
+
+    :param model: The SheetModel to recalculate.
+    :param workers: The number of worker processes (None for one per CPU).
+    :return: The number of formulas that failed (including the ones in reference cycles).
+    """
+    levels, cyclic = model.graph.formulas_levels()
+    if not any(len(level) >= PARALLEL_MIN_LEVEL for level in levels):
+        return model.recalculate_all()
+
+    columns = _referenced_columns(model)
+    slots = {column: slot for slot, column in enumerate(columns)}
+    shape = (len(columns), model.rows)
+    block = shared_memory.SharedMemory(create=True, size=max(len(columns) * model.rows * 8, 1))
+    try:
+        numbers = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        for column, slot in slots.items():
+            numbers[slot] = model.column_numbers(column)
+        computed = {}
+        failed = len(cyclic)
+        pool_size = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=pool_size, initializer=_init_worker,
+                                 initargs=(block.name, shape, slots, model.rows, model.cols, model.text)) as executor:
+            for level in levels:
+                if len(level) < PARALLEL_MIN_LEVEL:
+                    results = []
+                    for i, j in level:
+                        evaluated = model.evaluate(i, j)
+                        results.append((i, j, None, evaluated))
+                else:
+                    size = -(-len(level) // (pool_size * CHUNKS_PER_WORKER))
+                    futures = []
+                    for start in range(0, len(level), size):
+                        chunk = level[start:start + size]
+                        overrides = {}
+                        for cell in chunk:
+                            for reference in model.graph.precedents[cell]:
+                                if reference in computed:
+                                    overrides[reference] = computed[reference]
+                        futures.append(executor.submit(
+                            _evaluate_cells, [(i, j, model.functions[(i, j)]) for i, j in chunk], overrides))
+                    results = [result for future in futures for result in future.result()]
+                for i, j, text, evaluated in results:
+                    if text is not None:
+                        model.set_text(i, j, text)
+                    if not evaluated:
+                        failed += 1
+                    computed[(i, j)] = model.text.get((i, j))
+                    slot = slots.get(j)
+                    if slot is not None:
+                        numbers[slot, i] = model.column_numbers(j, i, i + 1)[0]
+        for i, j in cyclic:
+            model.set_text(i, j, "Error")
+        return failed
+    finally:
+        block.close()
+        block.unlink()
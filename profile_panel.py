@@ -0,0 +1,36 @@
+import tkinter as tk
+import profiling
+
+
+class ProfilePanel:
+    """
+    A class representing the small always-on-top window showing the instrumentation of the application.
+    """
+
+    REFRESH_DELAY = 500
+
+    def __init__(self, root):
+        """
+        Initializes a ProfilePanel object and starts refreshing it.
+
+        :param root: The root tkinter object.
+        """
+        self.root = root
+        self.window = tk.Toplevel(root)
+        self.window.title("Performance")
+        self.window.attributes('-topmost', True)
+        self.window.geometry("+20+20")
+        self.label = tk.Label(self.window, font=("Courier", 9), justify=tk.LEFT, anchor=tk.NW, bg="white")
+        self.label.pack(fill=tk.BOTH, expand=True)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Shows the latest statistics, then schedules the next refresh.
+
+        :return: None
+        """
+        if not self.window.winfo_exists():
+            return
+        self.label.configure(text=profiling.format_report())
+        self.root.after(ProfilePanel.REFRESH_DELAY, self.refresh)
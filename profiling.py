@@ -0,0 +1,187 @@
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Upper bounds (in seconds) of the latency histogram buckets; the last bucket holds everything slower
+BUCKETS = (1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 0.1, 0.3, 1.0, 3.0)
+
+enabled = False
+stats = {}
+counters = {}
+_profiler = None
+
+
+class Stat:
+    """
+    A class representing the call count and latency histogram of an instrumented path.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        """
+        Initializes an empty Stat object.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        """
+        Records one call.
+
+        :param seconds: The duration of the call.
+        :return: None
+        """
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, fraction):
+        """
+        Estimates a percentile of the latency from the histogram.
+
+        :param fraction: The percentile as a fraction (0.95 for p95).
+        :return: The upper bound of the bucket holding the percentile (the maximum for the last bucket).
+        """
+        target = fraction * self.count
+        seen = 0
+        for bound, calls in zip(BUCKETS, self.buckets):
+            seen += calls
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Retrieves the statistics as a dictionary.
+
+        :return: A dictionary with count, total, mean, p50, p95, max and the histogram buckets.
+        """
+        return {"count": self.count, "total": self.total, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(0.5), "p95": self.percentile(0.95), "max": self.max,
+                "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["inf"], self.buckets))}
+
+
+def record(name, seconds):
+    """
+    Records the duration of one call of an instrumented path.
+
+    :param name: The name of the path.
+    :param seconds: The duration of the call.
+    :return: None
+    """
+    stat = stats.get(name)
+    if stat is None:
+        stat = stats[name] = Stat()
+    stat.add(seconds)
+
+
+def count(name, amount=1):
+    """
+    Increments a counter (when instrumentation is enabled).
+
+    :param name: The name of the counter.
+    :param amount: The increment.
+    :return: None
+    """
+    if enabled:
+        counters[name] = counters.get(name, 0) + amount
+
+
+def timed(name):
+    """
+    Decorates a function so that its calls are counted and timed when instrumentation is enabled.
+
+    :param name: The name the calls are recorded under.
+    :return: The decorator.
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def measure(name):
+    """
+    Counts and times the code of a with block when instrumentation is enabled.
+
+    :param name: The name the block is recorded under.
+    """
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def enable(cprofile=False):
+    """
+    Turns the instrumentation on.
+
+    :param cprofile: Whether to also run the cProfile profiler, for a dump with dump_cprofile.
+    :return: None
+    """
+    global enabled, _profiler
+    enabled = True
+    if cprofile and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def report():
+    """
+    Retrieves everything recorded so far.
+
+    :return: A dictionary with the timed paths, the counters and the formula cache statistics.
+    """
+    from formula import formula_cache
+    return {"timings": {name: stat.to_dict() for name, stat in sorted(stats.items())},
+            "counters": dict(sorted(counters.items())), "formula_cache": formula_cache.stats()}
+
+
+def format_report():
+    """
+    Formats the timed paths and counters as a fixed-width table.
+
+    :return: The text of the table.
+    """
+    lines = [f"{'path':22} {'calls':>7} {'mean ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+    for name, stat in sorted(stats.items()):
+        lines.append(f"{name:22} {stat.count:7} {stat.total / stat.count * 1e3:8.2f} "
+                     f"{stat.percentile(0.95) * 1e3:8.2f} {stat.max * 1e3:8.2f}")
+    for name, value in sorted(counters.items()):
+        lines.append(f"{name:22} {value:7}")
+    return "\n".join(lines)
+
+
+def dump(file_name):
+    """
+    Writes what was recorded to a file: cProfile statistics for a .prof file, the report as JSON otherwise.
+
+    :param file_name: The path to the output file.
+    :return: None
+    """
+    if file_name.endswith(".prof") and _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(file_name)
+        return
+    with open(file_name, "w") as f:
+        json.dump(report(), f, indent=2)
@@ -0,0 +1,81 @@
+import profiling
+
+
+class RecalcScheduler:
+    """
+    A class representing the debounced recalculation of a workbook.
+
+    Edited cells are marked dirty, and a single recalculation pass for all of them runs once the edits
+    pause for delay milliseconds: dirty formula cells are recalculated themselves, other cells only their
+    dependents. Every edit made while a pass is pending postpones it, saving one pass.
+    """
+
+    DELAY = 50
+
+    def __init__(self, root, recalculate, delay=DELAY):
+        """
+        Initializes a RecalcScheduler object.
+
+        :param root: The root tkinter object, whose event loop runs the passes.
+        :param recalculate: The function called with the dirty cells and the dirty formula cells.
+        :param delay: The pause (in milliseconds) after the last edit before the pass runs.
+        """
+        self.root = root
+        self.recalculate = recalculate
+        self.delay = delay
+        self.dirty = {}
+        self.job = None
+        self.passes = 0
+        self.skipped = 0
+
+    def mark_dirty(self, row, column, formula=False):
+        """
+        Marks a cell as changed, and (re)schedules the recalculation pass.
+
+        :param row: The row index of the changed cell.
+        :param column: The column index of the changed cell.
+        :param formula: Whether the formula of the cell changed, so the cell itself must be recalculated.
+        :return: None
+        """
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.skipped += 1
+            profiling.count("recalc_skipped")
+        self.dirty[(row, column)] = self.dirty.get((row, column), False) or formula
+        self.job = self.root.after(self.delay, self.flush)
+
+    def flush(self):
+        """
+        Runs the pending recalculation pass now (e.g. before the values of the sheet are read).
+
+        :return: None
+        """
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        if self.dirty:
+            cells = list(self.dirty)
+            formulas = [cell for cell, formula in self.dirty.items() if formula]
+            self.dirty.clear()
+            self.passes += 1
+            profiling.count("recalc_passes")
+            self.recalculate(cells, formulas)
+
+    def cancel(self):
+        """
+        Drops the pending recalculation pass and the dirty cells.
+
+        :return: None
+        """
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.dirty.clear()
+
+    def pending(self):
+        """
+        Checks whether a recalculation pass is scheduled.
+
+        :return: True if cells are waiting to be recalculated.
+        """
+        return bool(self.dirty)
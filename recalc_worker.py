@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+import profiling
+
+
+class RecalcWorker:
+    """
+    A class representing the background thread that evaluates formulas for the GUI.
+
+    Each request carries a snapshot of the cells its formulas read and write, so the worker never touches the
+    model the Tk thread edits, and a generation number. The results are put on a queue drained by the Tk main
+    loop (collect); requests and results older than the latest generation are dropped, and their cells are
+    recalculated with the next request.
+    """
+
+    POLL_DELAY = 20
+
+    def __init__(self):
+        """
+        Initializes a RecalcWorker object and starts its thread.
+        """
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.pending_cells = []
+        self.pending_formulas = []
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, model, cells, formulas=()):
+        """
+        Requests the recalculation of the dependents of changed cells (called from the Tk thread).
+
+        :param model: The SheetModel of the workbook.
+        :param cells: The (row, column) of the changed cells.
+        :param formulas: Formula cells to recalculate themselves as well (e.g. just submitted).
+        :return: The generation of the request.
+        """
+        self.pending_cells = list(dict.fromkeys(self.pending_cells + list(cells)))
+        self.pending_formulas = list(dict.fromkeys(self.pending_formulas + list(formulas)))
+        self.generation += 1
+        order, cyclic = model.graph.dependents_order(*self.pending_cells, formulas=self.pending_formulas)
+        self.requests.put((self.generation, model.snapshot(order), order, cyclic))
+        return self.generation
+
+    def busy(self):
+        """
+        Checks whether the results of the latest request are still expected.
+
+        :return: True if a recalculation is in progress.
+        """
+        return bool(self.pending_cells or self.pending_formulas)
+
+    def run(self):
+        """
+        Evaluates the requests one at a time (runs in the worker thread).
+
+        :return: None
+        """
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            generation, snapshot, order, cyclic = request
+            if generation != self.generation:
+                continue
+            failed = bool(cyclic)
+            start = time.perf_counter()
+            for i, j in order:
+                if generation != self.generation:
+                    profiling.count("recalc_dropped")
+                    break
+                if not snapshot.evaluate(i, j):
+                    failed = True
+            else:
+                if profiling.enabled:
+                    profiling.record("recalc_worker_pass", time.perf_counter() - start)
+                results = [(i, j, snapshot.get_text(i, j)) for i, j in order]
+                results += [(i, j, "Error") for i, j in cyclic]
+                self.results.put((generation, results, failed))
+
+    def collect(self):
+        """
+        Drains the finished results (called from the Tk thread).
+
+        :return: A tuple (results, failed) for the latest request, results being (row, column, text) tuples,
+                 or None if they are not ready.
+        """
+        latest = None
+        while True:
+            try:
+                generation, results, failed = self.results.get_nowait()
+            except queue.Empty:
+                return latest
+            if generation == self.generation:
+                self.pending_cells = []
+                self.pending_formulas = []
+                latest = results, failed
+            else:
+                self.dropped += 1
+
+    def wait(self):
+        """
+        Blocks until the results of the latest request are ready (called from the Tk thread).
+
+        :return: A tuple (results, failed) as returned by collect, or None if no request is in progress.
+        """
+        while self.busy():
+            generation, results, failed = self.results.get()
+            if generation == self.generation:
+                self.pending_cells = []
+                self.pending_formulas = []
+                return results, failed
+            self.dropped += 1
+        return None
+
+    def stop(self):
+        """
+        Drops the request in progress and stops the thread.
+
+        :return: None
+        """
+        self.generation += 1
+        self.pending_cells = []
+        self.pending_formulas = []
+        self.requests.put(None)
@@ -0,0 +1,180 @@
+def rectangle_difference(rectangle, other):
+    """
+    Splits the cells of a rectangle that are not in another rectangle into at most four rectangles.
+
+    :param rectangle: A (first_row, first_column, last_row, last_column) tuple, bounds included.
+    :param other: A (first_row, first_column, last_row, last_column) tuple, or None for no rectangle.
+    :return: A list of (first_row, first_column, last_row, last_column) tuples.
+    """
+    first_row, first_column, last_row, last_column = rectangle
+    if other is None:
+        return [rectangle]
+    top = max(first_row, other[0])
+    bottom = min(last_row, other[2])
+    left = max(first_column, other[1])
+    right = min(last_column, other[3])
+    if top > bottom or left > right:
+        return [rectangle]
+    parts = []
+    if first_row < top:
+        parts.append((first_row, first_column, top - 1, last_column))
+    if bottom < last_row:
+        parts.append((bottom + 1, first_column, last_row, last_column))
+    if first_column < left:
+        parts.append((top, first_column, bottom, left - 1))
+    if right < last_column:
+        parts.append((top, right + 1, bottom, last_column))
+    return parts
+
+
+def clip(rectangle, window):
+    """
+    Retrieves the part of a rectangle inside a window.
+
+    :param rectangle: A (first_row, first_column, last_row, last_column) tuple.
+    :param window: A (first_row, first_column, last_row, last_column) tuple.
+    :return: The (first_row, first_column, last_row, last_column) tuple of the common part, or None if there is none.
+    """
+    top, left = max(rectangle[0], window[0]), max(rectangle[1], window[1])
+    bottom, right = min(rectangle[2], window[2]), min(rectangle[3], window[3])
+    if top > bottom or left > right:
+        return None
+    return top, left, bottom, right
+
+
+class Selection:
+    """
+    A class representing the selected cells of a sheet as a list of rectangular ranges.
+
+    Each range is stored as its anchor (the cell the mouse was pressed on) and its extent (the cell it was
+    dragged to), so membership is checked against the bounds of each range instead of a list of cells,
+    and extending a range only changes the cells between its old and new bounds.
+    """
+
+    __slots__ = ("ranges",)
+
+    def __init__(self):
+        """
+        Initializes an empty Selection object.
+        """
+        self.ranges = []
+
+    @staticmethod
+    def bounds(anchor, extent):
+        """
+        Retrieves the bounds of a range.
+
+        :param anchor: The (row, column) of the anchor of the range.
+        :param extent: The (row, column) of the extent of the range.
+        :return: A (first_row, first_column, last_row, last_column) tuple.
+        """
+        return (min(anchor[0], extent[0]), min(anchor[1], extent[1]),
+                max(anchor[0], extent[0]), max(anchor[1], extent[1]))
+
+    def rectangles(self):
+        """
+        Retrieves the bounds of every range.
+
+        :return: A list of (first_row, first_column, last_row, last_column) tuples.
+        """
+        return [Selection.bounds(anchor, extent) for anchor, extent in self.ranges]
+
+    def start(self, row, column, add=False):
+        """
+        Starts a new range on a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param add: Whether to keep the current ranges (multi-range selection) instead of replacing them.
+        :return: The bounds of the ranges that were removed.
+        """
+        removed = [] if add else self.rectangles()
+        if not add:
+            self.ranges = []
+        self.ranges.append(((row, column), (row, column)))
+        return removed
+
+    def extend(self, row, column):
+        """
+        Moves the extent of the last range to a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: A tuple (added, removed) of the lists of bounds of the cells that entered and left the range.
+        """
+        if not self.ranges:
+            self.start(row, column)
+            return [(row, column, row, column)], []
+        anchor, extent = self.ranges[-1]
+        if extent == (row, column):
+            return [], []
+        old = Selection.bounds(anchor, extent)
+        new = Selection.bounds(anchor, (row, column))
+        self.ranges[-1] = (anchor, (row, column))
+        return rectangle_difference(new, old), rectangle_difference(old, new)
+
+    def clear(self):
+        """
+        Removes every range.
+
+        :return: The bounds of the ranges that were removed.
+        """
+        removed = self.rectangles()
+        self.ranges = []
+        return removed
+
+    def anchor(self):
+        """
+        Retrieves the anchor of the first range.
+
+        :return: The (row, column) of the anchor, or None if nothing is selected.
+        """
+        return self.ranges[0][0] if self.ranges else None
+
+    def __contains__(self, cell):
+        row, column = cell
+        for (anchor_row, anchor_column), (extent_row, extent_column) in self.ranges:
+            if (min(anchor_row, extent_row) <= row <= max(anchor_row, extent_row)
+                    and min(anchor_column, extent_column) <= column <= max(anchor_column, extent_column)):
+                return True
+        return False
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+    def is_single_cell(self):
+        """
+        Checks whether the selection is one cell.
+
+        :return: True if exactly one cell is selected.
+        """
+        return len(self.ranges) == 1 and self.ranges[0][0] == self.ranges[0][1]
+
+    def cells(self):
+        """
+        Yields the selected cells, range by range and row by row, each cell once.
+        """
+        seen = set() if len(self.ranges) > 1 else None
+        for first_row, first_column, last_row, last_column in self.rectangles():
+            for i in range(first_row, last_row + 1):
+                for j in range(first_column, last_column + 1):
+                    if seen is not None:
+                        if (i, j) in seen:
+                            continue
+                        seen.add((i, j))
+                    yield i, j
+
+    def references(self, name):
+        """
+        Retrieves the selection as references of a formula, one per range (e.g. A1:B3,D4).
+
+        :param name: A function converting a (row, column) pair to the name of the cell.
+        :return: The comma-separated references.
+        """
+        references = []
+        for first_row, first_column, last_row, last_column in self.rectangles():
+            reference = name(first_row, first_column)
+            if (first_row, first_column) != (last_row, last_column):
+                reference += ":" + name(last_row, last_column)
+            references.append(reference)
+        return ",".join(references)
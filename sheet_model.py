@@ -0,0 +1,726 @@
+import re
+import sys
+import numpy as np
+from formula import cell_value, compile_formula, move_references
+from dependency_graph import DependencyGraph
+from styles import StyleTable
+
+# Numeric columns are kept as {row: number} dictionaries until more than 1 / SPARSE_RATIO of their
+# rows hold numbers, then turned into a float64 array
+SPARSE_RATIO = 12
+_NUMBER_PATTERN = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+
+def _parse_number(text):
+    """
+    Parses the text of a cell as a finite number.
+
+    :param text: The text of the cell.
+    :return: The number as a float, or None if the text is not numeric.
+    """
+    if isinstance(text, str):
+        if _NUMBER_PATTERN.fullmatch(text):
+            return float(text)
+        return None
+    if isinstance(text, (int, float)) and not isinstance(text, bool) and np.isfinite(text):
+        return float(text)
+    return None
+
+
+def _format_number(number):
+    """
+    Formats a stored number the way it is displayed in a cell.
+
+    :param number: The number to format.
+    :return: The text of the number.
+    """
+    if number.is_integer() and abs(number) < 1e16:
+        return str(int(number))
+    return repr(number)
+
+
+def _dict_bytes(cells):
+    """
+    Measures a dictionary of cells, with its keys and values.
+
+    :param cells: The dictionary.
+    :return: The size in bytes.
+    """
+    size = sys.getsizeof(cells)
+    for key, value in cells.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class SheetModel:
+    """
+    A class representing the data of a sheet, independent of the widgets that display it.
+
+    Numbers live in one float64 NumPy column per sheet column (NaN where a cell is not numeric).
+    A column is None until a number is stored in it, and a {row: number} dictionary while only
+    a few of its rows hold numbers. Array columns may be longer than the sheet (their capacity
+    doubles as rows are appended); only the first self.rows entries are part of the sheet.
+    Text, and numbers whose text does not round-trip, live in a dictionary keyed by (row, column),
+    formulas live in a second dictionary registered in a DependencyGraph, and the style IDs of
+    customized cells (in the StyleTable of the sheet) in a third one. Empty cells take no memory
+    beyond the numeric columns that hold numbers elsewhere.
+    """
+
+    def __init__(self, rows, cols):
+        """
+        Initializes an empty SheetModel object.
+
+        :param rows: The number of rows.
+        :param cols: The number of columns.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.capacity = rows
+        self.columns = [None] * cols
+        self.text = {}
+        self.functions = {}
+        self.styles = {}
+        self.style_table = StyleTable()
+        self.graph = DependencyGraph()
+
+    @classmethod
+    def from_data(cls, data, rows=None, cols=None):
+        """
+        Builds a SheetModel from a list of lists of cell values.
+
+        :param data: The cell values, as read from a file.
+        :param rows: The number of rows (at least the number of rows in data).
+        :param cols: The number of columns (at least the length of the longest row in data).
+        :return: The new SheetModel object (data itself, grown to rows x cols, if it already is a SheetModel).
+        """
+        if isinstance(data, SheetModel):
+            while data.rows < (rows or 0):
+                data.add_row()
+            while data.cols < (cols or 0):
+                data.add_column()
+            return data
+        width = max((len(row) for row in data), default=0)
+        model = cls(max(rows or 0, len(data)), max(cols or 0, width))
+        model.set_rows(0, data)
+        return model
+
+    def set_rows(self, first_row, data):
+        """
+        Stores a block of rows of cell values, starting at a given row.
+
+        :param first_row: The row index of the first row of data.
+        :param data: The cell values, as read from a file (None or "" for empty cells).
+        :return: None
+        """
+        for i, row in enumerate(data, first_row):
+            for j, value in enumerate(row):
+                if value is not None and value != "":
+                    self.set_text(i, j, value if isinstance(value, str) else str(value))
+
+    def append_rows(self, data):
+        """
+        Appends rows of cell values to the sheet, adding columns if the rows are wider than the sheet.
+
+        :param data: The cell values of the new rows.
+        :return: None
+        """
+        first_row = self.rows
+        width = max((len(row) for row in data), default=0)
+        while self.cols < width:
+            self.add_column()
+        self._reserve(first_row + len(data))
+        self.rows = first_row + len(data)
+        self.set_rows(first_row, data)
+
+    def _reserve(self, rows):
+        """
+        Makes sure the numeric columns can hold a number of rows, doubling their capacity when they grow.
+
+        :param rows: The number of rows needed.
+        :return: None
+        """
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2)
+        padding = np.full(capacity - self.capacity, np.nan)
+        self.columns = [np.concatenate((column, padding)) if isinstance(column, np.ndarray) else column
+                        for column in self.columns]
+        self.capacity = capacity
+
+    def _number(self, row, column):
+        """
+        Retrieves the number stored in a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The number as a float, NaN if the cell holds no number.
+        """
+        numbers = self.columns[column]
+        if numbers is None:
+            return np.nan
+        if isinstance(numbers, dict):
+            return numbers.get(row, np.nan)
+        return float(numbers[row])
+
+    def _store_number(self, row, column, number):
+        """
+        Stores the number of a cell, turning the column into an array once it is dense enough.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param number: The number, or NaN to clear it.
+        :return: None
+        """
+        numbers = self.columns[column]
+        if isinstance(numbers, np.ndarray):
+            numbers[row] = number
+        elif np.isnan(number):
+            if numbers:
+                numbers.pop(row, None)
+        else:
+            if numbers is None:
+                numbers = self.columns[column] = {}
+            numbers[row] = number
+            if len(numbers) * SPARSE_RATIO > self.capacity:
+                self.columns[column] = self.column_numbers(column, 0, self.capacity)
+
+    def column_numbers(self, column, first_row=0, last_row=None):
+        """
+        Retrieves the numbers of a slice of a column.
+
+        :param column: The column index.
+        :param first_row: The first row index of the slice.
+        :param last_row: The row index after the slice (the number of rows if None).
+        :return: A float array (a view of array columns), with NaN for empty and text cells.
+        """
+        if last_row is None:
+            last_row = self.rows
+        numbers = self.columns[column]
+        if isinstance(numbers, np.ndarray):
+            return numbers[first_row:last_row]
+        array = np.full(max(last_row - first_row, 0), np.nan)
+        if numbers:
+            for row, number in numbers.items():
+                if first_row <= row < last_row:
+                    array[row - first_row] = number
+        return array
+
+    def _check(self, row, column):
+        if not (0 <= row < self.rows and 0 <= column < self.cols):
+            raise IndexError("Cell (" + str(row) + ", " + str(column) + ") is outside the sheet")
+
+    def set_text(self, row, column, text):
+        """
+        Stores the text of a cell, keeping numbers in the numeric column.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param text: The text of the cell.
+        :return: None
+        """
+        self._check(row, column)
+        key = (row, column)
+        number = _parse_number(text)
+        self.text.pop(key, None)
+        if number is None:
+            self._store_number(row, column, np.nan)
+            if text:
+                self.text[key] = text
+        else:
+            self._store_number(row, column, number)
+            if _format_number(number) != text:
+                self.text[key] = text
+
+    def get_text(self, row, column):
+        """
+        Retrieves the text of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The text of the cell, or an empty string if the cell is empty.
+        """
+        text = self.text.get((row, column))
+        if text is not None:
+            return text
+        number = self._number(row, column)
+        if np.isnan(number):
+            return ""
+        return _format_number(float(number))
+
+    def value(self, row, column):
+        """
+        Retrieves the value of a cell as seen by formulas.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The value of the cell.
+        """
+        self._check(row, column)
+        text = self.text.get((row, column))
+        if text is not None:
+            return cell_value(text)
+        number = self._number(row, column)
+        if np.isnan(number):
+            return 0
+        if number.is_integer():
+            return int(number)
+        return number
+
+    def block(self, first_row, first_column, last_row, last_column):
+        """
+        Retrieves the numbers of a range of cells, clipped to the sheet.
+
+        :param first_row: The first row index of the range.
+        :param first_column: The first column index of the range.
+        :param last_row: The last row index of the range (inclusive).
+        :param last_column: The last column index of the range (inclusive).
+        :return: A 2-D float array (a view when the range is a single column), with NaN for empty and text cells.
+        """
+        last_row = min(last_row, self.rows - 1) + 1
+        columns = range(first_column, min(last_column, self.cols - 1) + 1)
+        if len(columns) == 1:
+            return self.column_numbers(first_column, first_row, last_row)[:, None]
+        if not columns:
+            return np.empty((0, 0))
+        return np.column_stack([self.column_numbers(j, first_row, last_row) for j in columns])
+
+    def set_function(self, row, column, function):
+        """
+        Sets the formula of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param function: The formula text.
+        :return: None
+        """
+        self.functions[(row, column)] = function
+        self.graph.set_formula((row, column), function)
+
+    def clear_function(self, row, column):
+        """
+        Clears the formula of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: None
+        """
+        self.functions.pop((row, column), None)
+        self.graph.remove_formula((row, column))
+
+    def get_function(self, row, column):
+        """
+        Retrieves the formula of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The formula of the cell, or an empty string if no formula is set.
+        """
+        return self.functions.get((row, column), "")
+
+    def set_style(self, row, column, style):
+        """
+        Sets the style of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :param style: The style ID of the cell in self.style_table.
+        :return: None
+        """
+        if style == StyleTable.DEFAULT:
+            self.styles.pop((row, column), None)
+        else:
+            self.styles[(row, column)] = style
+
+    def get_style(self, row, column):
+        """
+        Retrieves the style of a cell.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: The style ID of the cell.
+        """
+        return self.styles.get((row, column), StyleTable.DEFAULT)
+
+    def evaluate(self, row, column):
+        """
+        Evaluates the formula of a cell and stores its result as the cell text.
+
+        :param row: The row index of the cell.
+        :param column: The column index of the cell.
+        :return: True if the formula was evaluated, False if it failed and the cell shows Error.
+        """
+        try:
+            solution = compile_formula(self.functions[(row, column)]).evaluate(self)
+        except Exception:
+            self.set_text(row, column, "Error")
+            return False
+        self.set_text(row, column, str(solution))
+        return True
+
+    def recalculate(self, row, column):
+        """
+        Recalculates the formulas that depend (directly or transitively) on a cell, in topological order.
+
+        :param row: The row index of the changed cell.
+        :param column: The column index of the changed cell.
+        :return: A tuple (updated, failed) as returned by recalculate_cells.
+        """
+        return self.recalculate_cells([(row, column)])
+
+    def recalculate_cells(self, cells, formulas=()):
+        """
+        Recalculates the formulas that depend on any of several cells, each one once, in topological order.
+
+        :param cells: The (row, column) of the changed cells.
+        :param formulas: Formula cells to recalculate themselves as well (e.g. just submitted).
+        :return: A tuple (updated, failed): the recalculated cells and whether any of them failed
+                 (including the ones in reference cycles).
+        """
+        order, cyclic = self.graph.dependents_order(*cells, formulas=formulas)
+        failed = bool(cyclic)
+        for i, j in order:
+            if not self.evaluate(i, j):
+                failed = True
+        for i, j in cyclic:
+            self.set_text(i, j, "Error")
+        return order + cyclic, failed
+
+    def snapshot(self, cells=None):
+        """
+        Copies the data formulas read and write, so they can be evaluated away from this model.
+
+        When the formula cells to evaluate are given, only what they need is copied: the columns of their
+        large ranges, and the text and numbers of the cells they reference (and of the formula cells themselves).
+
+        :param cells: The (row, column) of the formula cells to evaluate, or None to copy the whole sheet.
+        :return: A SheetModel sharing nothing mutable with this one (no styles, no dependency graph edges).
+        """
+        model = SheetModel(0, 0)
+        model.rows, model.cols, model.capacity = self.rows, self.cols, self.capacity
+        if cells is None:
+            model.columns = [column.copy() if column is not None else None for column in self.columns]
+            model.text = dict(self.text)
+            model.functions = dict(self.functions)
+            return model
+        needed = set(cells)
+        range_columns = set()
+        for cell in cells:
+            needed.update(self.graph.precedents.get(cell, ()))
+            for first_row, first_column, last_row, last_column in self.graph.ranges.get(cell, ()):
+                range_columns.update(range(first_column, min(last_column, self.cols - 1) + 1))
+        model.columns = [None] * self.cols
+        for column in range_columns:
+            numbers = self.columns[column]
+            model.columns[column] = numbers.copy() if numbers is not None else None
+        for row, column in needed:
+            if column in range_columns or not (0 <= row < self.rows and 0 <= column < self.cols):
+                continue
+            number = self._number(row, column)
+            if not np.isnan(number):
+                if model.columns[column] is None:
+                    model.columns[column] = {}
+                model.columns[column][row] = number
+        model.text = {cell: self.text[cell] for cell in needed if cell in self.text}
+        model.functions = {cell: self.functions[cell] for cell in cells if cell in self.functions}
+        return model
+
+    def recalculate_all(self, workers=1):
+        """
+        Recalculates every formula of the sheet in topological order.
+
+        :param workers: The number of processes evaluating independent formulas in parallel
+                        (1 to evaluate in this process, None for one per CPU).
+        :return: The number of formulas that failed (including the ones in reference cycles).
+        """
+        if workers != 1:
+            from parallel_eval import recalculate_parallel
+            return recalculate_parallel(self, workers)
+        order, cyclic = self.graph.formulas_order()
+        failed = len(cyclic)
+        for i, j in order:
+            if not self.evaluate(i, j):
+                failed += 1
+        for i, j in cyclic:
+            self.set_text(i, j, "Error")
+        return failed
+
+    def load_formulas(self):
+        """
+        Turns cells whose text starts with "=" (as written by Excel-style files) into formulas.
+
+        :return: The number of formulas found.
+        """
+        formulas = [(key, text) for key, text in self.text.items() if text.startswith("=")]
+        for (row, column), text in formulas:
+            self.set_function(row, column, text[1:].upper())
+        return len(formulas)
+
+    def add_row(self):
+        """
+        Appends an empty row to the sheet.
+
+        :return: None
+        """
+        self._reserve(self.rows + 1)
+        self.rows += 1
+
+    def add_column(self):
+        """
+        Appends an empty column to the sheet.
+
+        :return: None
+        """
+        self.cols += 1
+        self.columns.append(None)
+
+    def insert_rows(self, index, count):
+        """
+        Inserts empty rows, moving the rows below them (and the references to them) down.
+
+        :param index: The row index of the first inserted row.
+        :param count: The number of rows to insert.
+        :return: The formula cells whose formula changed, to be recalculated.
+        """
+        if not 0 <= index <= self.rows:
+            raise IndexError("Row " + str(index) + " is outside the sheet")
+        rewritten = self._rewrite_formulas(0, index, count)
+        self._reserve(self.rows + count)
+        for numbers in self.columns:
+            if isinstance(numbers, np.ndarray):
+                numbers[index + count:self.rows + count] = numbers[index:self.rows]
+                numbers[index:index + count] = np.nan
+        self.rows += count
+        return self._move_cells(0, index, count, rewritten)
+
+    def delete_rows(self, index, count):
+        """
+        Deletes rows, moving the rows below them (and the references to them) up.
+
+        :param index: The row index of the first deleted row.
+        :param count: The number of rows to delete.
+        :return: A tuple (changed, removed): the formula cells whose formula changed, to be recalculated,
+                 and the cells to restore_cells if the rows are inserted again.
+        """
+        if not (0 <= index and index + count <= self.rows and count < self.rows):
+            raise IndexError("Rows " + str(index) + " to " + str(index + count - 1) + " can't be deleted")
+        rewritten = self._rewrite_formulas(0, index, -count)
+        removed = self._removed_cells(0, index, count, rewritten)
+        for numbers in self.columns:
+            if isinstance(numbers, np.ndarray):
+                numbers[index:self.rows - count] = numbers[index + count:self.rows]
+                numbers[self.rows - count:self.rows] = np.nan
+        self.rows -= count
+        return self._move_cells(0, index, -count, rewritten), removed
+
+    def insert_columns(self, index, count):
+        """
+        Inserts empty columns, moving the columns right of them (and the references to them) right.
+
+        :param index: The column index of the first inserted column.
+        :param count: The number of columns to insert.
+        :return: The formula cells whose formula changed, to be recalculated.
+        """
+        if not 0 <= index <= self.cols:
+            raise IndexError("Column " + str(index) + " is outside the sheet")
+        rewritten = self._rewrite_formulas(1, index, count)
+        self.columns[index:index] = [None] * count
+        self.cols += count
+        return self._move_cells(1, index, count, rewritten)
+
+    def delete_columns(self, index, count):
+        """
+        Deletes columns, moving the columns right of them (and the references to them) left.
+
+        :param index: The column index of the first deleted column.
+        :param count: The number of columns to delete.
+        :return: A tuple (changed, removed) as returned by delete_rows.
+        """
+        if not (0 <= index and index + count <= self.cols and count < self.cols):
+            raise IndexError("Columns " + str(index) + " to " + str(index + count - 1) + " can't be deleted")
+        rewritten = self._rewrite_formulas(1, index, -count)
+        removed = self._removed_cells(1, index, count, rewritten)
+        del self.columns[index:index + count]
+        self.cols -= count
+        return self._move_cells(1, index, -count, rewritten), removed
+
+    def _rewrite_formulas(self, axis, index, count):
+        """
+        Rewrites the formulas referencing cells moved by an insertion or deletion, without changing the sheet.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param count: The number of inserted rows or columns, or minus the number of deleted ones.
+        :return: A dictionary of the rewritten formulas, keyed by the (row, column) of their cell before the change
+                 (the formulas of deleted cells are left out).
+        """
+        end = index - count
+        rewritten = {}
+        for key, function in self.functions.items():
+            if index <= key[axis] < end:
+                continue
+            moved = move_references(function, axis, index, count)
+            if moved != function:
+                rewritten[key] = moved
+        return rewritten
+
+    def _removed_cells(self, axis, index, count, rewritten):
+        """
+        Collects what is lost when rows or columns are deleted: the cells deleted and the original formulas
+        of the cells whose formula will be rewritten.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first deleted row or column.
+        :param count: The number of deleted rows or columns.
+        :param rewritten: The rewritten formulas, as returned by _rewrite_formulas.
+        :return: A dictionary with the text, functions and styles to restore, keyed by (row, column).
+        """
+        end = index + count
+        text = {}
+        if axis == 0:
+            for j in range(self.cols):
+                numbers = self.column_numbers(j, index, end)
+                for i in np.flatnonzero(~np.isnan(numbers)).tolist():
+                    text[(index + i, j)] = _format_number(float(numbers[i]))
+        else:
+            for j in range(index, end):
+                numbers = self.column_numbers(j)
+                for i in np.flatnonzero(~np.isnan(numbers)).tolist():
+                    text[(i, j)] = _format_number(float(numbers[i]))
+        text.update((key, value) for key, value in self.text.items() if index <= key[axis] < end)
+        functions = {key: function for key, function in self.functions.items()
+                     if index <= key[axis] < end or key in rewritten}
+        styles = {key: style for key, style in self.styles.items() if index <= key[axis] < end}
+        return {"text": text, "functions": functions, "styles": styles}
+
+    def restore_cells(self, removed):
+        """
+        Puts back the cells collected by delete_rows or delete_columns (after the rows or columns were inserted again).
+
+        :param removed: The dictionary returned by delete_rows or delete_columns.
+        :return: The restored formula cells, to be recalculated.
+        """
+        for (row, column), text in removed["text"].items():
+            self.set_text(row, column, text)
+        for (row, column), function in removed["functions"].items():
+            self.set_function(row, column, function)
+        for (row, column), style in removed["styles"].items():
+            self.set_style(row, column, style)
+        return list(removed["functions"])
+
+    def _move_cells(self, axis, index, count, rewritten):
+        """
+        Moves the text, sparse numbers, formulas and styles of the cells after an insertion or deletion point,
+        drops the deleted cells, stores the rewritten formulas and rebuilds the dependency graph.
+
+        The numeric array columns are moved by the caller.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param count: The number of inserted rows or columns, or minus the number of deleted ones.
+        :param rewritten: The rewritten formulas, as returned by _rewrite_formulas.
+        :return: The formula cells whose formula changed, to be recalculated.
+        """
+        end = index - count
+
+        def moved(key):
+            if key[axis] < index:
+                return key
+            return (key[0] + count, key[1]) if axis == 0 else (key[0], key[1] + count)
+
+        def moved_cells(cells):
+            return {moved(key): value for key, value in cells.items() if not index <= key[axis] < end}
+
+        if axis == 0:
+            for j, numbers in enumerate(self.columns):
+                if isinstance(numbers, dict):
+                    self.columns[j] = {row + count if row >= index else row: number
+                                       for row, number in numbers.items() if not index <= row < end}
+        self.text = moved_cells(self.text)
+        self.styles = moved_cells(self.styles)
+        self.functions = moved_cells({key: rewritten.get(key, function) for key, function in self.functions.items()})
+        self.graph.clear()
+        for key, function in self.functions.items():
+            self.graph.set_formula(key, function)
+        return [moved(key) for key in rewritten]
+
+    def iter_rows(self):
+        """
+        Yields the text of the sheet one row at a time.
+
+        :return: A generator of lists of cell text.
+        """
+        for i in range(self.rows):
+            yield [self.get_text(i, j) for j in range(self.cols)]
+
+    def iter_values(self, chunk_size=1024):
+        """
+        Yields the typed values of the sheet one row at a time.
+
+        :param chunk_size: The number of rows converted from the numeric columns at once.
+        :return: A generator of lists of values: the stored text for cells that have one (including numbers
+                 whose text does not round-trip, e.g. "007" or "1.50"), int or float for the other numbers,
+                 None for empty cells.
+        """
+        for start in range(0, self.rows, chunk_size):
+            stop = min(start + chunk_size, self.rows)
+            if self.cols:
+                numbers = np.column_stack([self.column_numbers(j, start, stop) for j in range(self.cols)]).tolist()
+            else:
+                numbers = [[] for _ in range(start, stop)]
+            for i, row in enumerate(numbers, start):
+                for j, number in enumerate(row):
+                    text = self.text.get((i, j))
+                    if text is not None or number != number:
+                        row[j] = text
+                    elif number.is_integer() and abs(number) < 1e16:
+                        row[j] = int(number)
+                yield row
+
+    def memory_report(self):
+        """
+        Measures the memory held by the data of the sheet.
+
+        :return: A dictionary with the number of populated cells, the bytes held by the numeric columns,
+                 the text, the formulas and the styles, their total, and the bytes per populated cell.
+        """
+        numbers = 0
+        populated = set()
+        for j, column in enumerate(self.columns):
+            if isinstance(column, np.ndarray):
+                rows = np.flatnonzero(~np.isnan(column[:self.rows])).tolist()
+                numbers += int(column.nbytes)
+            elif column is not None:
+                rows = list(column)
+                numbers += _dict_bytes(column)
+            else:
+                continue
+            populated.update(zip(rows, [j] * len(rows)))
+        populated.update(self.text, self.functions, self.styles)
+        report = {"cells": self.rows * self.cols, "populated_cells": len(populated),
+                  "array_columns": sum(isinstance(column, np.ndarray) for column in self.columns),
+                  "sparse_columns": sum(isinstance(column, dict) for column in self.columns),
+                  "numbers_bytes": numbers, "text_bytes": _dict_bytes(self.text),
+                  "functions_bytes": _dict_bytes(self.functions), "styles_bytes": _dict_bytes(self.styles)}
+        report["total_bytes"] = (numbers + report["text_bytes"] + report["functions_bytes"] +
+                                 report["styles_bytes"] + sys.getsizeof(self.columns))
+        report["bytes_per_populated_cell"] = report["total_bytes"] / max(len(populated), 1)
+        return report
+
+    def to_list(self):
+        """
+        Retrieves the text of the whole sheet.
+
+        :return: A list of lists of cell text.
+        """
+        return list(self.iter_rows())
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.rows:
+            raise IndexError("Row " + str(row) + " is outside the sheet")
+        return [self.get_text(row, j) for j in range(self.cols)]
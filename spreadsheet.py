@@ -54,11 +54,11 @@ class Spreadsheet:
         Opens an existing spreadsheet file.
         """
         try:
-            data = open_file()
+            data, chunks = open_file()
             if data[0][0]:
                 pass
             self.menu_canvas.destroy()
-            self.work_book = Workbook(self.root, data)
+            self.work_book = Workbook(self.root, data, chunks)
         except:
             messagebox.showwarning("Failed", "Wrong file format")
 
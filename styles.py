@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+Style = namedtuple("Style", ["family", "size", "weight", "slant", "underline", "fg", "bg", "justify"])
+
+DEFAULT_STYLE = Style(family="Arial", size=14, weight="normal", slant="roman", underline=0,
+                      fg="black", bg="white", justify="left")
+
+
+class StyleTable:
+    """
+    A class representing the distinct styles used by a sheet.
+
+    Every style (font, colors and alignment) is stored once and identified by a small integer,
+    so cells only hold a style ID. The Tk fonts are shared as well: one font per distinct
+    (family, size, weight, slant, underline), created the first time a cell shows it.
+    """
+
+    DEFAULT = 0
+
+    def __init__(self):
+        """
+        Initializes a StyleTable object holding only the default style.
+        """
+        self.styles = []
+        self.ids = {}
+        self.fonts = {}
+        self.intern(DEFAULT_STYLE)
+
+    def intern(self, style):
+        """
+        Retrieves the ID of a style, adding the style to the table if it is new.
+
+        :param style: A Style, or a dictionary with the same fields.
+        :return: The style ID.
+        """
+        if not isinstance(style, Style):
+            style = Style(**style)
+        style_id = self.ids.get(style)
+        if style_id is None:
+            style_id = len(self.styles)
+            self.styles.append(style)
+            self.ids[style] = style_id
+        return style_id
+
+    def get(self, style_id):
+        """
+        Retrieves a style.
+
+        :param style_id: The style ID.
+        :return: The Style.
+        """
+        return self.styles[style_id]
+
+    def derive(self, style_id, **changes):
+        """
+        Retrieves the ID of a style that differs from another one by some fields.
+
+        :param style_id: The ID of the original style.
+        :param changes: The fields to change (e.g. weight="bold").
+        :return: The ID of the changed style.
+        """
+        return self.intern(self.styles[style_id]._replace(**changes))
+
+    def font(self, style_id):
+        """
+        Retrieves the shared Tk font of a style.
+
+        :param style_id: The style ID.
+        :return: The font object.
+        """
+        from tkinter import font
+        style = self.styles[style_id]
+        key = style[:5]
+        shared_font = self.fonts.get(key)
+        if shared_font is None:
+            shared_font = font.Font(family=style.family, size=style.size, weight=style.weight,
+                                    slant=style.slant, underline=style.underline)
+            self.fonts[key] = shared_font
+        return shared_font
+
+    def __len__(self):
+        return len(self.styles)
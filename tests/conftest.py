@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sheet_model import SheetModel
+
+
+@pytest.fixture
+def make_model():
+    """
+    Builds SheetModel objects from cell text and formulas.
+
+    :return: A function taking a list of lists of cell text and a {(row, column): formula} dictionary,
+             and returning the SheetModel (not recalculated).
+    """
+    def build(data, functions=None):
+        model = SheetModel.from_data(data)
+        for (row, column), function in (functions or {}).items():
+            model.set_function(row, column, function)
+        return model
+    return build
+
+
+class FakeRoot:
+    """
+    Stands in for the Tk root: callbacks scheduled with after are kept until run_pending is called.
+    """
+
+    def __init__(self):
+        self.jobs = {}
+        self.count = 0
+
+    def after(self, delay, callback, *args):
+        self.count += 1
+        job = "after#" + str(self.count)
+        self.jobs[job] = (delay, callback, args)
+        return job
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_pending(self):
+        """
+        Runs the callbacks scheduled so far (not the ones they schedule).
+
+        :return: None
+        """
+        jobs, self.jobs = self.jobs, {}
+        for delay, callback, args in jobs.values():
+            callback(*args)
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
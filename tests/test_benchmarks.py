@@ -0,0 +1,33 @@
+import json
+
+import numpy as np
+from benchmarks import suite
+
+
+def test_slowdowns_over_the_threshold_are_regressions(capsys):
+    results = {"fast": 1.0, "slow": 1.5, "new": 2.0}
+    assert suite.compare(results, {"fast": 1.0, "slow": 1.0}, 0.2) == ["slow"]
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_the_committed_baseline_covers_every_benchmark():
+    with open(suite.BASELINE) as f:
+        baseline = json.load(f)["results"]
+    names = [name for name, function, args in suite.micro_benchmarks()]
+    names += [kind + "." + extension + "." + size for size in suite.IO_SIZES.split(",")
+              for extension in suite.FILE_FORMATS for kind in ("write", "read")]
+    assert all(baseline.get(name, 0) > 0 for name in names)
+
+
+def test_slow_runs_are_not_repeated(monkeypatch):
+    calls = []
+    monkeypatch.setattr(suite, "SLOW_RUN", 0.0)
+    suite.best_run(calls.append, 1)
+    assert calls == [1]
+
+
+def test_benchmark_sheets_are_built_through_the_model():
+    model = suite.build_model(30)
+    assert (model.rows, model.cols) == (30, suite.COLUMNS)
+    assert model.get_text(4, 2) == "item4"
+    assert not np.isnan(model.column_numbers(0)).any()
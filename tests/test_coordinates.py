@@ -0,0 +1,36 @@
+import pytest
+from coordinates import cell_name, column_index, column_label, parse_reference, to_a1, to_r1c1
+from helper import number_to_excel_column, indices_to_excel, _excel_to_indices
+
+
+@pytest.mark.parametrize("index, letters", [(0, "A"), (25, "Z"), (26, "AA"), (701, "ZZ"), (702, "AAA"),
+                                            (16383, "XFD"), (16384, "XFE")])
+def test_column_labels_round_trip(index, letters):
+    assert column_label(index) == letters
+    assert column_index(letters) == index
+    assert column_index(letters.lower()) == index
+
+
+def test_negative_column_has_no_label():
+    assert column_label(-1) == ""
+
+
+def test_cell_references_round_trip():
+    assert cell_name(0, 0) == "A1"
+    assert cell_name(11, 27) == "AB12"
+    assert parse_reference("ab12") == (11, 27)
+    assert to_r1c1("B3") == "R3C2"
+    assert to_a1("r3c2") == "B3"
+
+
+@pytest.mark.parametrize("reference", ["A", "12", "A1B", "1A"])
+def test_invalid_references_fail(reference):
+    with pytest.raises(ValueError):
+        parse_reference(reference)
+
+
+def test_helper_conversions_use_the_cached_module():
+    assert number_to_excel_column(28) == "AB"
+    assert number_to_excel_column(0) == ""
+    assert indices_to_excel(11, 27) == "AB12"
+    assert _excel_to_indices("AB12") == (11, 27)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from formula import FormulaError, compile_formula, parse_criterion
+
+DATA = [["5", "1"], ["20", "2"], ["text", "3"], ["", "4"], ["15", "5"]]
+
+
+@pytest.mark.parametrize("criterion, expected", [(">15", [False, True, False]), ("<>5", [False, True, True]),
+                                                 ("15", [False, False, True]), ("<=15", [True, False, True])])
+def test_criteria_are_masks_over_numbers(criterion, expected):
+    numbers = np.array([5.0, 20.0, 15.0, np.nan])
+    assert parse_criterion(criterion)(numbers).tolist() == expected + [False]
+
+
+@pytest.mark.parametrize("formula, expected", [("COUNTIF(A1:A5, '>=15')", 2), ("COUNTIF(A1:A5, '<>5')", 2),
+                                               ("COUNTIF(A1, A2, A5, '>1')", 3), ("SUMIF(A1:A5, '>10')", 35),
+                                               ("SUMIF(A1:A5, '>10', B1:B5)", 7),
+                                               ("AVERAGEIF(A1:A5, '<20', B1:B5)", 3.0)])
+def test_conditional_functions(make_model, formula, expected):
+    assert compile_formula(formula).evaluate(make_model(DATA)) == expected
+
+
+@pytest.mark.parametrize("formula", ["COUNTIF(A1:A5, 'abc')", "SUMIF(A1:A5, '>1', B1:B2)"])
+def test_invalid_criteria_fail(make_model, formula):
+    with pytest.raises(FormulaError):
+        compile_formula(formula).evaluate(make_model(DATA))
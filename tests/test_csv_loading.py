@@ -0,0 +1,44 @@
+from helper import iter_csv_file, read_csv_file, write_csv_file
+from sheet_model import SheetModel
+from workbook import Workbook
+
+
+def build_workbook(root, data):
+    book = Workbook.__new__(Workbook)
+    book.root = root
+    book.model = SheetModel.from_data(data)
+    if book.model.load_formulas():
+        book.model.recalculate_all()
+    book.sheet = [None] * Workbook.VISIBLE_ROWS
+    book.column_labels = [None] * Workbook.VISIBLE_COLUMNS
+    book.render = lambda: None
+    return book
+
+
+def test_formulas_of_the_first_chunk_see_the_rows_loaded_later(root, tmp_path):
+    file_name = tmp_path / "book.csv"
+    lines = ["=SUM(B1:B120),1,=B110"] + [",1," for _ in range(119)]
+    file_name.write_text("\n".join(lines) + "\n")
+    chunks = iter_csv_file(str(file_name), chunk_size=50)
+    book = build_workbook(root, next(chunks))
+    assert book.model.get_text(0, 0) == "50"
+
+    root.after_idle(book.load_next_chunk, chunks, book.model)
+    while root.jobs:
+        root.run_pending()
+
+    assert book.model.rows == 120
+    assert book.model.get_text(0, 0) == "120"
+    assert book.model.get_text(0, 2) == "1"
+
+
+def test_csv_files_are_read_in_chunks(make_model, tmp_path):
+    file_name = str(tmp_path / "book.csv")
+    model = make_model([[str(i), "", "item " + str(i)] for i in range(7)])
+    write_csv_file(file_name, model)
+
+    chunks = list(iter_csv_file(file_name, chunk_size=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert chunks[0][1] == ["1", None, "item 1"]
+    assert read_csv_file(file_name) == [row for chunk in chunks for row in chunk]
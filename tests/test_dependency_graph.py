@@ -0,0 +1,27 @@
+from dependency_graph import DependencyGraph
+
+
+def test_dependents_are_ordered_topologically():
+    graph = DependencyGraph()
+    graph.set_formula((0, 2), "A1 * 10")
+    graph.set_formula((0, 3), "C1 + B1")
+    graph.set_formula((0, 4), "B1")
+    assert graph.dependents_order((0, 0)) == ([(0, 2), (0, 3)], [])
+    assert graph.dependents_order((0, 1)) == ([(0, 3), (0, 4)], [])
+
+
+def test_reference_cycles_are_reported():
+    graph = DependencyGraph()
+    graph.set_formula((0, 1), "A1 + C1")
+    graph.set_formula((0, 2), "B1 * 2")
+    order, cyclic = graph.dependents_order((0, 0))
+    assert order == []
+    assert sorted(cyclic) == [(0, 1), (0, 2)]
+
+
+def test_removed_formulas_have_no_dependents():
+    graph = DependencyGraph()
+    graph.set_formula((1, 0), "A1 + 1")
+    graph.remove_formula((1, 0))
+    assert graph.dependents_order((0, 0)) == ([], [])
+    assert graph.dependents == {}
@@ -0,0 +1,17 @@
+from helper import iter_excel_file, read_excel_file, write_excel_file
+
+
+def test_saved_cells_keep_their_text(make_model, tmp_path):
+    file_name = str(tmp_path / "book.xlsx")
+    model = make_model([["007", "1.50", "1e3", "12345678901234567890"], ["42", "2.5", "label", ""]])
+    write_excel_file(file_name, model)
+    rows = read_excel_file(file_name)
+    assert rows == [["007", "1.50", "1e3", "12345678901234567890"], [42, 2.5, "label"]]
+
+
+def test_excel_files_are_read_in_chunks(make_model, tmp_path):
+    file_name = str(tmp_path / "book.xlsx")
+    write_excel_file(file_name, make_model([[str(i), "item " + str(i)] for i in range(5)]))
+    chunks = list(iter_excel_file(file_name, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[2] == [[4, "item 4"]]
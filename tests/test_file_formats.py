@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from helper import get_file_format, load_backend, read_file, write_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["yaml", "pandas", "openpyxl", "reportlab", "pdfplumber"]
+
+
+def test_backends_are_not_imported_at_startup():
+    code = "import sys, helper; print([name for name in " + repr(HEAVY_MODULES) + " if name in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_backends_are_imported_once():
+    assert load_backend("json") is load_backend("json") is sys.modules["json"]
+
+
+@pytest.mark.parametrize("extension, empty", [("json", ""), ("yaml", ""), ("csv", None)])
+def test_text_formats_round_trip(make_model, tmp_path, extension, empty):
+    file_name = str(tmp_path / ("book." + extension))
+    write_file(file_name, make_model([["1", "a"], ["", "2.5"]]))
+    assert read_file(file_name) == [["1", "a"], [empty, "2.5"]]
+
+
+def test_unknown_formats_fail():
+    with pytest.raises(ValueError):
+        get_file_format("book.txt")
@@ -0,0 +1,74 @@
+import pytest
+import workbook
+from formula import FormulaError, shift_formula
+from journal import Journal
+from recalc_scheduler import RecalcScheduler
+from sheet_model import SheetModel
+from workbook import Workbook
+
+
+def build_workbook(root, passes):
+    book = Workbook.__new__(Workbook)
+    book.model = SheetModel.from_data([["1", ""], ["2", ""], ["3", ""]])
+    book.journal = Journal()
+    book.scheduler = RecalcScheduler(root, lambda cells, formulas: passes.append(formulas))
+    return book
+
+
+def test_fill_upward_outside_the_sheet(monkeypatch, root):
+    warnings = []
+    monkeypatch.setattr(workbook.messagebox, "showwarning", lambda title, message: warnings.append(message))
+    passes = []
+    book = build_workbook(root, passes)
+    book.model.set_function(1, 1, "A1")
+
+    book.fill_cells((1, 1), [(0, 1), (2, 1)])
+
+    assert book.model.get_function(0, 1) == ""
+    assert book.model.get_function(2, 1) == "A2"
+    assert len(warnings) == 1 and "B1" in warnings[0]
+    assert passes == [[(2, 1)]]
+    assert book.journal.undo() == [(2, 1, "function", "")]
+
+
+def test_fill_shifts_formulas_that_cant_be_tokenized(monkeypatch, root):
+    warnings = []
+    monkeypatch.setattr(workbook.messagebox, "showwarning", lambda title, message: warnings.append(message))
+    passes = []
+    book = build_workbook(root, passes)
+    book.model.set_function(0, 1, "A1 $ 2")
+
+    book.fill_cells((0, 1), [(1, 1), (2, 1)])
+
+    assert [book.model.get_function(i, 1) for i in (1, 2)] == ["A2 $ 2", "A3 $ 2"]
+    assert warnings == []
+
+
+def test_fill_across_rows_and_columns_is_one_batch(root):
+    passes = []
+    book = build_workbook(root, passes)
+    book.model.set_function(0, 1, "A1 * 2")
+    book.model.add_column()
+
+    book.fill_cells((0, 1), [(1, 1), (2, 1), (0, 2), (2, 2)])
+
+    assert [book.model.get_function(i, j) for i, j in ((1, 1), (2, 1), (0, 2), (2, 2))] == \
+        ["A2 * 2", "A3 * 2", "B1 * 2", "B3 * 2"]
+    assert passes == [[(1, 1), (2, 1), (0, 2), (2, 2)]]
+    assert len(book.journal) == 1
+
+
+@pytest.mark.parametrize("formula, rows, columns, expected", [("SUM(A1:B2) + C3", 1, 2, "SUM(C2:D3) + E4"),
+                                                              ("'A1' + A1", 0, 1, "'A1' + B1"),
+                                                              ("MAX(Z9, AA10)", -8, 1, "MAX(AA1, AB2)")])
+def test_shift_formula(formula, rows, columns, expected):
+    assert shift_formula(formula, rows, columns) == expected
+
+
+def test_shift_formula_outside_the_sheet_fails():
+    with pytest.raises(FormulaError):
+        shift_formula("A2 + B1", -1, 0)
+
+
+def test_shift_formula_keeps_text_it_cant_tokenize():
+    assert shift_formula("A1 $ B2 # C3", 1, 1) == "B2 $ C3 # D4"
@@ -0,0 +1,58 @@
+import warnings
+
+import pytest
+from formula import FormulaError, compile_formula
+
+DATA = [["a", "1"], ["b", "3"], ["", ""]]
+
+
+@pytest.mark.parametrize("formula", ["AVERAGE(A1:A3)", "AVERAGE(A3:B3)", "AVERAGEIF(B1:B2, '>5')"])
+def test_average_without_numbers_fails(make_model, formula):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with pytest.raises(ZeroDivisionError):
+            compile_formula(formula).evaluate(make_model(DATA))
+
+
+def test_average_without_numbers_shows_error(make_model):
+    model = make_model(DATA)
+    model.set_function(2, 1, "AVERAGE(A1:A2)")
+    assert not model.evaluate(2, 1)
+    assert model.get_text(2, 1) == "Error"
+    model.set_function(2, 0, "AVERAGE(B1:B2)")
+    model.evaluate(2, 0)
+    assert model.get_text(2, 0) == "2.0"
+
+
+@pytest.mark.parametrize("formula", ["AVERAGE(A3)", "AVERAGE(A1, A3)", "AVG(B3)"])
+def test_average_of_cells_without_numbers_fails_like_a_range(make_model, formula):
+    with pytest.raises(ZeroDivisionError):
+        compile_formula(formula).evaluate(make_model(DATA))
+
+
+def test_average_of_cells_skips_empty_and_text_cells(make_model):
+    model = make_model(DATA)
+    assert compile_formula("AVERAGE(B1, A3, A1, B2)").evaluate(model) == 2.0
+    assert compile_formula("AVERAGE(B2)").evaluate(model) == compile_formula("AVERAGE(B2:B2)").evaluate(model)
+    assert compile_formula("AVERAGE(B1 + 1, 4)").evaluate(model) == 3
+
+
+@pytest.mark.parametrize("formula", ["A1:B2", "B1:B2 * 2", "ABS(B1:B2)"])
+def test_range_results_fail(make_model, formula):
+    model = make_model(DATA, {(2, 0): formula})
+    with pytest.raises(FormulaError):
+        compile_formula(formula).evaluate(model)
+    assert not model.evaluate(2, 0)
+    assert model.get_text(2, 0) == "Error"
+
+
+@pytest.mark.parametrize("formula, expected", [("SUM(B1:B3)", 4), ("MIN(A1:B2)", 1), ("MAX(B1:B2, 7)", 7),
+                                               ("SUM(A1:A3)", 0), ("SUM(B1:B2) / 2", 2.0)])
+def test_range_aggregates(make_model, formula, expected):
+    assert compile_formula(formula).evaluate(make_model(DATA)) == expected
+
+
+def test_ranges_are_registered_once():
+    compiled = compile_formula("SUM(B2:A1) + MAX(A1:B2) + C3")
+    assert compiled.ranges == [(0, 0, 1, 1)]
+    assert compiled.references == [(2, 2)]
@@ -0,0 +1,39 @@
+import pytest
+from formula import FormulaCache, compile_formula
+from helper import _ListValues
+
+
+def test_repeated_formulas_are_compiled_once():
+    cache = FormulaCache(maxsize=2)
+    first = cache.get("A1 + 1")
+    assert cache.get("A1 + 1") is first
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2, "hit_rate": 0.5}
+
+
+def test_least_recently_used_formulas_are_evicted():
+    cache = FormulaCache(maxsize=2)
+    first = cache.get("A1 + 1")
+    cache.get("A1 + 2")
+    cache.get("A1 + 1")
+    cache.get("A1 + 3")
+    assert cache.get("A1 + 1") is first
+    assert cache.misses == 3
+    cache.get("A1 + 2")
+    assert cache.misses == 4
+
+    cache.resize(1)
+    assert cache.stats()["size"] == 1
+
+
+def test_compiled_formulas_evaluate_against_the_cell_values():
+    data = [["2", "3"]]
+    compiled = compile_formula("A1 * B1 + 1")
+    assert compiled.references == [(0, 0), (0, 1)]
+    assert compiled.evaluate(_ListValues(data)) == 7
+    data[0][1] = "4"
+    assert compiled.evaluate(_ListValues(data)) == 9
+
+
+@pytest.mark.parametrize("formula, expected", [("2^3", 8), ("-2^2", -4), ("2^-1", 0.5), ("2^3^2", 512)])
+def test_caret_is_exponentiation(formula, expected):
+    assert compile_formula(formula).evaluate(_ListValues([[""]])) == expected
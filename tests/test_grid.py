@@ -0,0 +1,76 @@
+import pytest
+from selection import Selection
+from sheet_model import SheetModel
+from workbook import Workbook
+
+
+class FakeWidget:
+    """
+    Stands in for the pooled cell widgets, labels and scrollbars, keeping what they were told to show.
+    """
+
+    def __init__(self):
+        self.row = self.column = self.text = self.style = None
+        self.options = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+
+    def set(self, first, last):
+        self.options["view"] = (first, last)
+
+    def get_cell(self):
+        return self
+
+    def bind_to(self, i, j):
+        self.row, self.column = i, j
+
+    def set_text(self, text):
+        self.text = text
+
+    def set_style(self, style_id):
+        self.style = style_id
+
+
+@pytest.mark.parametrize("args, expected", [(("moveto", "0.5"), 500), (("moveto", "1.0"), 960),
+                                            (("scroll", "3", "units"), 13), (("scroll", "-1", "pages"), 0),
+                                            (("scroll", "2", "pages"), 90)])
+def test_scroll_target_stays_inside_the_sheet(args, expected):
+    assert Workbook.scroll_target(args, 10, 1000, 40) == expected
+
+
+def test_only_visible_cells_have_a_widget():
+    book = Workbook.__new__(Workbook)
+    book.sheet = [[(i, j) for j in range(3)] for i in range(2)]
+    book.top_row, book.left_column = 100, 5
+    assert book.get_cell_widget(101, 7) == (1, 2)
+    assert book.get_cell_widget(99, 5) is None
+    assert book.get_cell_widget(100, 8) is None
+
+
+def test_scrolling_rebinds_the_pool_to_the_visible_cells():
+    book = Workbook.__new__(Workbook)
+    book.model = SheetModel.from_data([[str(i * 100 + j) for j in range(20)] for i in range(50)])
+    book.model.set_style(11, 12, 3)
+    book.selection = Selection()
+    book.selection.start(10, 11)
+    book.on_focus_text = None
+    book.sheet = [[FakeWidget() for j in range(3)] for i in range(2)]
+    book.row_labels = [FakeWidget() for i in range(2)]
+    book.column_labels = [FakeWidget() for j in range(3)]
+    book.y_scrollbar, book.x_scrollbar = FakeWidget(), FakeWidget()
+    book.top_row = book.left_column = 0
+    book.render()
+
+    book.yview("scroll", 10, "units")
+    book.xview("moveto", "0.5")
+
+    assert [[(cell.row, cell.column, cell.text) for cell in row] for row in book.sheet] == \
+        [[(10, 10, "1010"), (10, 11, "1011"), (10, 12, "1012")], [(11, 10, "1110"), (11, 11, "1111"), (11, 12, "1112")]]
+    assert book.sheet[1][2].style == 3 and book.sheet[0][0].style == 0
+    assert [cell.options["highlightbackground"] for cell in book.sheet[0]] == ["white", "black", "white"]
+    assert [label.options["text"] for label in book.row_labels] == ["11", "12"]
+    assert [label.options["text"] for label in book.column_labels] == ["K", "L", "M"]
+    assert book.y_scrollbar.options["view"] == (0.2, 0.24)
@@ -0,0 +1,47 @@
+from journal import Journal
+
+
+def test_deleted_cells_count_towards_the_cap(make_model):
+    model = make_model([["text " + str(i), str(i)] for i in range(20000)])
+    changed, removed = model.delete_rows(0, 19000)
+    journal = Journal(max_bytes=1024 * 1024)
+    journal.record(0, 0, "rows", (20000, removed), 1000)
+    assert journal.size > 19000 * 2 * 50
+
+    for i in range(3):
+        journal.record(i, 1, "text", "", "x")
+    assert journal.evicted == 1
+    assert journal.size <= journal.max_bytes
+
+
+def test_keystrokes_in_one_cell_are_merged():
+    journal = Journal()
+    for old, new in (("", "1"), ("1", "12"), ("12", "123")):
+        journal.record(0, 0, "text", old, new, typing=True)
+    journal.seal()
+    journal.record(0, 0, "text", "123", "1234", typing=True)
+    assert len(journal) == 2
+    assert journal.undo() == [(0, 0, "text", "123")]
+    assert journal.undo() == [(0, 0, "text", "")]
+    assert journal.redo() == [(0, 0, "text", "123")]
+
+
+def test_transactions_form_one_entry_and_undo_in_reverse():
+    journal = Journal()
+    with journal.transaction("fill"):
+        journal.record(0, 0, "function", "", "A2")
+        with journal.transaction("inner"):
+            journal.record(0, 0, "text", "", "5")
+        journal.record(1, 0, "text", "x", "x")
+    assert len(journal) == 1
+    assert journal.undo() == [(0, 0, "text", ""), (0, 0, "function", "")]
+    assert journal.undo() == []
+
+
+def test_new_changes_clear_the_redo_history():
+    journal = Journal()
+    journal.record(0, 0, "text", "", "a")
+    journal.undo()
+    journal.record(0, 1, "text", "", "b")
+    assert journal.redo() == []
+    assert journal.size == journal.undo_entries[0].size
@@ -0,0 +1,47 @@
+import argparse
+import json
+
+import main
+from helper import read_native_file, write_native_file
+
+
+def recalc_args(files, **options):
+    arguments = {"out": None, "out_dir": None, "format": None, "workers": 1}
+    arguments.update(options)
+    return argparse.Namespace(files=files, **arguments)
+
+
+def test_recalc_counts_the_formulas_of_native_files(make_model, tmp_path, capsys):
+    file_name = str(tmp_path / "book.ssb")
+    model = make_model([["1", "2", ""], ["3", "", ""]], {(0, 2): "A1 + B1", (1, 2): "SUM(A1:B2)"})
+    write_native_file(file_name, model)
+
+    assert main.recalc(recalc_args([file_name])) == 0
+
+    assert "2x3 cells, 2 formulas (0 errors)" in capsys.readouterr().out
+    recalculated = read_native_file(str(tmp_path / "book.recalc.ssb"))
+    assert recalculated.get_text(0, 2) == "3"
+    assert recalculated.get_text(1, 2) == "6"
+
+
+def test_recalc_writes_each_file_in_the_requested_format(tmp_path, capsys):
+    (tmp_path / "a.csv").write_text("1,2,=A1+B1\n3,4,=C1*A2\n")
+    (tmp_path / "b.csv").write_text("=1/0\n")
+    out_dir = tmp_path / "out"
+
+    assert main.recalc(recalc_args([str(tmp_path / "a.csv"), str(tmp_path / "b.csv")], out_dir=str(out_dir),
+                                   format="json")) == 0
+
+    assert json.loads((out_dir / "a.json").read_text()) == [["1", "2", "3"], ["3", "4", "9"]]
+    assert json.loads((out_dir / "b.json").read_text()) == [["Error"]]
+    assert "1 formulas (1 errors)" in capsys.readouterr().out
+
+
+def test_recalc_reports_unreadable_files(tmp_path, capsys):
+    assert main.recalc(recalc_args([str(tmp_path / "missing.csv")])) == 1
+    assert "missing.csv: failed" in capsys.readouterr().err
+
+
+def test_output_path_next_to_the_input():
+    assert main.get_output_path("data/book.xlsx", recalc_args([])) == "data/book.recalc.xlsx"
+    assert main.get_output_path("book.xlsx", recalc_args([], out="x.csv")) == "x.csv"
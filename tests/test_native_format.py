@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+from helper import read_native_file, write_native_file
+from sheet_model import SheetModel
+
+
+def test_resave_to_the_opened_file(tmp_path):
+    file_name = str(tmp_path / "book.ssb")
+    model = SheetModel(5000, 5)
+    for j in range(5):
+        model.columns[j] = np.arange(5000, dtype=float) + j
+    model.set_text(2, 1, "label")
+    model.set_function(0, 4, "SUM(A1:A3)")
+    write_native_file(file_name, model)
+
+    opened = read_native_file(file_name)
+    opened.set_text(3, 0, "7.5")
+    write_native_file(file_name, opened)
+
+    reopened = read_native_file(file_name)
+    assert (reopened.rows, reopened.cols) == (5000, 5)
+    assert reopened.get_text(3, 0) == "7.5"
+    assert reopened.get_text(2, 1) == "label"
+    assert reopened.get_text(4999, 3) == "5002"
+    assert reopened.get_function(0, 4) == "SUM(A1:A3)"
+    assert opened.get_text(4999, 4) == "5003"
+    assert os.listdir(str(tmp_path)) == ["book.ssb"]
+
+
+def test_styles_and_text_round_trip(make_model, tmp_path):
+    file_name = str(tmp_path / "book.ssb")
+    model = make_model([["1", "007", "\u00e9t\u00e9"], ["", "2.5", ""]])
+    bold = model.style_table.derive(0, weight="bold", fg="red")
+    model.set_style(1, 2, bold)
+    write_native_file(file_name, model)
+
+    opened = read_native_file(file_name)
+    assert opened.to_list() == model.to_list()
+    assert isinstance(opened.columns[0], np.memmap)
+    style = opened.style_table.get(opened.get_style(1, 2))
+    assert (style.weight, style.fg) == ("bold", "red")
+    assert opened.get_style(0, 0) == 0
+
+
+def test_other_files_are_rejected(tmp_path):
+    file_name = tmp_path / "book.ssb"
+    file_name.write_bytes(b"not a workbook" * 10)
+    with pytest.raises(ValueError):
+        read_native_file(str(file_name))
@@ -0,0 +1,22 @@
+from parallel_eval import PARALLEL_MIN_LEVEL
+
+
+def build_model(make_model):
+    rows = PARALLEL_MIN_LEVEL + 44
+    functions = {}
+    for i in range(rows):
+        functions[(i, 2)] = "A" + str(i + 1) + " + B" + str(i + 1)
+        functions[(i, 3)] = "C" + str(i + 1) + " + SUM(A1:A" + str(rows) + ")"
+    functions[(0, 4)] = "1 / 0"
+    functions[(1, 4)] = "E3 + 1"
+    functions[(2, 4)] = "E2 + 1"
+    return make_model([[str(i), "x" if i == 7 else str(i % 5), "", "", ""] for i in range(rows)], functions)
+
+
+def test_parallel_recalculation_matches_the_serial_one(make_model):
+    serial = build_model(make_model)
+    parallel = build_model(make_model)
+    assert serial.recalculate_all() == 5
+    assert parallel.recalculate_all(workers=2) == 5
+    assert parallel.to_list() == serial.to_list()
+    assert parallel.get_text(7, 2) == parallel.get_text(7, 3) == "Error"
@@ -0,0 +1,71 @@
+import pdfplumber
+from reportlab.pdfgen import canvas
+from helper import PDF_HEADER_GRAY, iter_pdf_file, read_pdf_file, write_pdf_file
+
+
+def test_empty_cells_are_not_drawn(make_model, tmp_path):
+    file_name = str(tmp_path / "book.pdf")
+    model = make_model([["1", "", "x"], ["", "2", ""]])
+    write_pdf_file(file_name, model)
+    rows = read_pdf_file(file_name, workers=1)
+    assert rows == [["1", "x"], ["2"]]
+
+
+def test_cells_are_drawn_as_typed(make_model, tmp_path):
+    file_name = str(tmp_path / "book.pdf")
+    model = make_model([["007", "1.50", "1e3"], ["42", "2.5", "label"]])
+    write_pdf_file(file_name, model)
+    assert read_pdf_file(file_name, workers=1) == [["007", "1.50", "1e3"], ["42", "2.5", "label"]]
+
+
+def test_gray_text_of_other_pdf_files_is_read(tmp_path):
+    file_name = str(tmp_path / "other.pdf")
+    c = canvas.Canvas(file_name)
+    c.setFillGray(PDF_HEADER_GRAY)
+    c.drawString(100, 700, "gray")
+    c.setFillGray(0)
+    c.drawString(100, 600, "black")
+    c.save()
+    assert read_pdf_file(file_name, workers=1) == [["gray"], ["black"]]
+
+
+def test_none_written_by_older_exports_is_read_as_an_empty_cell(tmp_path):
+    file_name = str(tmp_path / "old.pdf")
+    c = canvas.Canvas(file_name)
+    c.drawString(100, 700, "1 None x")
+    c.save()
+    assert read_pdf_file(file_name, workers=1) == [["1", None, "x"]]
+
+
+def test_pages_extracted_in_parallel_come_back_in_order(tmp_path):
+    file_name = str(tmp_path / "book.pdf")
+    data = [[str(i), "item" + str(i)] for i in range(80)]
+    c = canvas.Canvas(file_name)
+    for first in range(0, 80, 20):
+        for i, row in enumerate(data[first:first + 20]):
+            c.drawString(100, 700 - i * 20, " ".join(row))
+        c.showPage()
+    c.save()
+    progress = []
+
+    chunks = list(iter_pdf_file(file_name, workers=2, progress=lambda done, total: progress.append((done, total)),
+                                pages_per_task=1))
+
+    assert len(chunks) == 4
+    assert [row for chunk in chunks for row in chunk] == data
+    assert progress == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+
+def test_wide_sheets_are_split_into_tiles(make_model, tmp_path):
+    file_name = str(tmp_path / "book.pdf")
+    data = [[str(i * 10 + j) for j in range(10)] for i in range(30)]
+    write_pdf_file(file_name, make_model(data))
+
+    with pdfplumber.open(file_name) as pdf:
+        assert len(pdf.pages) == 4
+        assert pdf.pages[1].extract_text().split("\n")[0].split() == ["I", "J"]
+
+    rows = read_pdf_file(file_name, workers=1)
+    assert rows[0] == data[0][:8]
+    assert rows[26] == data[0][8:]
+    assert rows[52] == data[26][:8]
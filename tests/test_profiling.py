@@ -0,0 +1,58 @@
+import json
+import sys
+
+import pytest
+import main
+import profiling
+
+
+@pytest.fixture
+def instrumentation(monkeypatch):
+    monkeypatch.setattr(profiling, "enabled", True)
+    monkeypatch.setattr(profiling, "stats", {})
+    monkeypatch.setattr(profiling, "counters", {})
+    return profiling
+
+
+def test_timed_paths_are_recorded_only_when_enabled(instrumentation, monkeypatch):
+    @profiling.timed("square")
+    def square(number):
+        return number * number
+
+    assert square(3) == 9
+    profiling.count("hits", 2)
+    monkeypatch.setattr(profiling, "enabled", False)
+    square(4)
+    profiling.count("hits")
+    assert profiling.stats["square"].count == 1
+    assert profiling.counters == {"hits": 2}
+
+
+def test_percentiles_come_from_the_histogram():
+    stat = profiling.Stat()
+    for seconds in [2e-5] * 95 + [0.5] * 5:
+        stat.add(seconds)
+    assert stat.percentile(0.5) == 3e-5
+    assert stat.percentile(0.95) == 3e-5
+    assert stat.percentile(0.99) == 0.5
+    assert stat.to_dict()["buckets"]["1.0"] == 5
+
+
+def test_report_is_written_as_json(instrumentation, tmp_path):
+    with profiling.measure("block"):
+        pass
+    file_name = str(tmp_path / "profile.json")
+    profiling.dump(file_name)
+    with open(file_name) as f:
+        report = json.load(f)
+    assert report["timings"]["block"]["count"] == 1
+    assert "hit_rate" in report["formula_cache"]
+    assert profiling.format_report().splitlines()[1].startswith("block")
+
+
+@pytest.mark.parametrize("arguments, profile, profile_out", [([], False, None), (["--profile"], True, "profile.json"),
+                                                             (["--profile-out", "x.prof"], True, "x.prof")])
+def test_profile_arguments(monkeypatch, arguments, profile, profile_out):
+    monkeypatch.setattr(sys, "argv", ["main.py"] + arguments)
+    args = main.parse_arguments()
+    assert (args.profile, args.profile_out) == (profile, profile_out)
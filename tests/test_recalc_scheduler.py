@@ -0,0 +1,37 @@
+from recalc_scheduler import RecalcScheduler
+
+
+def test_a_burst_of_edits_runs_one_pass(root):
+    passes = []
+    scheduler = RecalcScheduler(root, lambda cells, formulas: passes.append((cells, formulas)), delay=20)
+    scheduler.mark_dirty(0, 0)
+    scheduler.mark_dirty(1, 0, formula=True)
+    scheduler.mark_dirty(0, 0)
+    assert len(root.jobs) == 1 and list(root.jobs.values())[0][0] == 20
+    assert scheduler.pending() and passes == []
+
+    root.run_pending()
+
+    assert passes == [([(0, 0), (1, 0)], [(1, 0)])]
+    assert (scheduler.passes, scheduler.skipped) == (1, 2)
+    assert not scheduler.pending()
+
+
+def test_flush_runs_the_pending_pass_now(root):
+    passes = []
+    scheduler = RecalcScheduler(root, lambda cells, formulas: passes.append(cells))
+    scheduler.flush()
+    scheduler.mark_dirty(2, 3)
+    scheduler.flush()
+    assert passes == [[(2, 3)]]
+    assert root.jobs == {}
+
+
+def test_cancel_drops_the_dirty_cells(root):
+    passes = []
+    scheduler = RecalcScheduler(root, lambda cells, formulas: passes.append(cells))
+    scheduler.mark_dirty(0, 0)
+    scheduler.cancel()
+    root.run_pending()
+    scheduler.flush()
+    assert passes == [] and root.jobs == {}
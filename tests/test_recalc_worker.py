@@ -0,0 +1,94 @@
+import numpy as np
+from journal import Journal
+from recalc_scheduler import RecalcScheduler
+from recalc_worker import RecalcWorker
+from sheet_model import SheetModel
+from workbook import Workbook
+
+
+def build_model():
+    model = SheetModel(10000, 20)
+    for j in range(20):
+        model.columns[j] = np.arange(10000, dtype=float) * (j + 1)
+    model.set_text(0, 3, "label")
+    model.set_function(0, 5, "B2 + SUM(C1:C10000)")
+    model.set_function(1, 5, "F1 * 2")
+    return model
+
+
+def test_submitted_pass_copies_only_what_its_formulas_read(monkeypatch):
+    snapshots = []
+    snapshot = SheetModel.snapshot
+
+    def recording_snapshot(self, *args):
+        snapshots.append(snapshot(self, *args))
+        return snapshots[-1]
+
+    monkeypatch.setattr(SheetModel, "snapshot", recording_snapshot)
+    model = build_model()
+    worker = RecalcWorker()
+    try:
+        worker.submit(model, [(1, 1)])
+        results, failed = worker.wait()
+    finally:
+        worker.stop()
+
+    copied = snapshots[0]
+    assert [j for j, numbers in enumerate(copied.columns) if numbers is not None] == [1, 2, 5]
+    assert isinstance(copied.columns[2], np.ndarray) and isinstance(copied.columns[1], dict)
+    assert copied.text == {} and sorted(copied.functions) == [(0, 5), (1, 5)]
+    assert not failed
+    model.recalculate_cells([(1, 1)])
+    assert results == [(i, j, model.get_text(i, j)) for i, j, text in results]
+    assert model.get_text(1, 5) == "299970004"
+
+
+def test_reference_cycles_fail():
+    model = build_model()
+    model.set_function(2, 5, "F4 + 1")
+    model.set_function(3, 5, "F3 + A1")
+    worker = RecalcWorker()
+    try:
+        worker.submit(model, [(0, 0)])
+        results, failed = worker.wait()
+    finally:
+        worker.stop()
+    assert failed
+    assert sorted(results) == [(2, 5, "Error"), (3, 5, "Error")]
+
+
+def test_a_newer_request_replaces_an_older_one():
+    model = build_model()
+    worker = RecalcWorker()
+    try:
+        worker.submit(model, [(1, 1)])
+        model.set_text(5, 0, "label")
+        worker.submit(model, [(5, 0)], [(1, 5)])
+        assert worker.pending_cells == [(1, 1), (5, 0)]
+        results, failed = worker.wait()
+        assert worker.wait() is None
+    finally:
+        worker.stop()
+    assert sorted(i for i, j, text in results) == [0, 1]
+    assert not worker.busy()
+
+
+def test_a_submitted_function_is_evaluated_by_the_worker(root):
+    passes = []
+    book = Workbook.__new__(Workbook)
+    book.model = SheetModel.from_data([["2", "old"]])
+    book.journal = Journal()
+    book.scheduler = RecalcScheduler(root, lambda cells, formulas: passes.append(formulas))
+
+    book.set_cell_function(0, 1, "A1 * 3")
+
+    assert book.model.get_text(0, 1) == "old"
+    root.run_pending()
+    assert passes == [[(0, 1)]]
+    worker = RecalcWorker()
+    try:
+        worker.submit(book.model, [], passes[0])
+        assert worker.wait() == ([(0, 1, "6")], False)
+    finally:
+        worker.stop()
+    assert sorted(book.journal.undo()) == [(0, 1, "function", ""), (0, 1, "text", "old")]
@@ -0,0 +1,27 @@
+def test_reference_cycles_fail(make_model):
+    model = make_model([["1", "", ""]], {(0, 1): "A1 + C1", (0, 2): "B1 * 2"})
+    updated, failed = model.recalculate(0, 0)
+    assert failed
+    assert sorted(updated) == [(0, 1), (0, 2)]
+    assert model.get_text(0, 1) == model.get_text(0, 2) == "Error"
+
+
+def test_only_the_transitive_dependents_are_recalculated(make_model):
+    model = make_model([["1", "2", "", "", ""]], {(0, 2): "A1 * 10", (0, 3): "C1 + B1", (0, 4): "B1"})
+    model.recalculate_all()
+    model.set_text(0, 0, "5")
+    updated, failed = model.recalculate(0, 0)
+    assert not failed
+    assert updated == [(0, 2), (0, 3)]
+    assert model.get_text(0, 3) == "52"
+    assert model.get_text(0, 4) == "2"
+
+
+def test_large_ranges_track_the_cells_inside_them(make_model):
+    model = make_model([[str(i), "", ""] for i in range(100)], {(0, 1): "SUM(A1:A100)", (1, 1): "B1 + 1"})
+    model.recalculate_all()
+    model.set_text(50, 0, "0")
+    updated, failed = model.recalculate(50, 0)
+    assert updated == [(0, 1), (1, 1)]
+    assert model.get_text(1, 1) == "4901"
+    assert model.recalculate(0, 2) == ([], False)
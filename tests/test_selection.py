@@ -0,0 +1,36 @@
+from coordinates import cell_name
+from selection import Selection, clip, rectangle_difference
+
+
+def test_extending_a_range_reports_only_the_changed_cells():
+    selection = Selection()
+    selection.start(1, 1)
+    assert selection.extend(3, 2) == ([(2, 1, 3, 2), (1, 2, 1, 2)], [])
+    assert selection.extend(2, 2) == ([], [(3, 1, 3, 2)])
+    assert selection.extend(2, 2) == ([], [])
+    assert (2, 2) in selection and (3, 1) not in selection
+    assert selection.rectangles() == [(1, 1, 2, 2)]
+
+
+def test_ranges_can_be_added_and_cleared():
+    selection = Selection()
+    selection.start(0, 0)
+    selection.extend(1, 1)
+    assert selection.start(1, 1, add=True) == []
+    selection.extend(2, 1)
+    assert list(selection.cells()) == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 1)]
+    assert selection.references(cell_name) == "A1:B2,B2:B3"
+    assert selection.anchor() == (0, 0)
+    assert not selection.is_single_cell()
+    assert selection.start(5, 5) == [(0, 0, 1, 1), (1, 1, 2, 1)]
+    assert selection.is_single_cell()
+    assert selection.clear() == [(5, 5, 5, 5)]
+    assert not selection
+
+
+def test_rectangle_helpers():
+    assert rectangle_difference((0, 0, 2, 2), (1, 1, 1, 1)) == [(0, 0, 0, 2), (2, 0, 2, 2), (1, 0, 1, 0), (1, 2, 1, 2)]
+    assert rectangle_difference((0, 0, 1, 1), (5, 5, 6, 6)) == [(0, 0, 1, 1)]
+    assert rectangle_difference((0, 0, 1, 1), (0, 0, 3, 3)) == []
+    assert clip((0, 0, 10, 10), (5, 8, 20, 20)) == (5, 8, 10, 10)
+    assert clip((0, 0, 1, 1), (5, 5, 6, 6)) is None
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+from sheet_model import SPARSE_RATIO, SheetModel
+
+
+def test_numbers_live_in_the_numeric_columns(make_model):
+    model = make_model([["1", "2.5", "text"], ["007", "", "TRUE"]])
+    assert model.column_numbers(0).tolist() == [1.0, 7.0]
+    assert math.isnan(model.column_numbers(2)[0])
+    assert model.text == {(0, 2): "text", (1, 0): "007", (1, 2): "TRUE"}
+    assert model.to_list() == [["1", "2.5", "text"], ["007", "", "TRUE"]]
+    assert [model.value(1, j) for j in range(3)] == [7, 0, True]
+
+
+def test_overwriting_a_cell_replaces_its_number_and_text(make_model):
+    model = make_model([["1", "a"]])
+    model.set_text(0, 0, "b")
+    model.set_text(0, 1, "2")
+    assert model.to_list() == [["b", "2"]]
+    assert model.text == {(0, 0): "b"}
+    assert math.isnan(model.column_numbers(0)[0])
+    model.set_text(0, 0, "")
+    assert model.get_text(0, 0) == ""
+
+
+def test_blocks_are_clipped_to_the_sheet(make_model):
+    model = make_model([["1", "x"], ["3", "4"]])
+    assert np.array_equal(model.block(0, 0, 5, 1), np.array([[1, np.nan], [3, 4]]), equal_nan=True)
+    assert model.block(0, 0, 1, 0).shape == (2, 1)
+
+
+def test_sheet_grows_by_rows_and_columns():
+    model = SheetModel.from_data([["1"]], rows=3, cols=2)
+    assert (model.rows, model.cols) == (3, 2)
+    model.add_row()
+    model.add_column()
+    model.set_text(3, 2, "5")
+    assert model.get_text(3, 2) == "5"
+    with pytest.raises(IndexError):
+        model.set_text(4, 0, "1")
+
+
+def test_columns_become_arrays_once_they_are_dense():
+    model = SheetModel(10 * SPARSE_RATIO, 3)
+    model.set_text(5, 1, "label")
+    for i in range(10):
+        model.set_text(i, 0, str(i))
+    assert model.columns[1] is None and model.columns[2] is None
+    assert model.columns[0] == {i: float(i) for i in range(10)}
+    model.set_text(10, 0, "10")
+    assert isinstance(model.columns[0], np.ndarray)
+    assert model.column_numbers(0)[:11].tolist() == list(range(11))
+
+
+def test_memory_report_counts_populated_cells():
+    model = SheetModel(1000, 50)
+    model.set_text(3, 4, "1")
+    model.set_text(7, 40, "note")
+    model.set_function(9, 9, "E4 * 2")
+    report = model.memory_report()
+    assert report["cells"] == 50000
+    assert report["populated_cells"] == 3
+    assert (report["array_columns"], report["sparse_columns"]) == (0, 1)
+    assert report["total_bytes"] < 10000
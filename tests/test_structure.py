@@ -0,0 +1,74 @@
+import pytest
+from formula import FormulaError, compile_formula, move_references
+from sheet_model import SheetModel
+
+
+@pytest.fixture
+def model(make_model):
+    model = make_model([[str(i * 10 + j) for j in range(3)] for i in range(6)],
+                       {(0, 2): "A2+B3", (1, 2): "SUM(A1:A6)"})
+    model.recalculate_all()
+    return model
+
+
+def test_deleted_reference_fails_evaluation():
+    with pytest.raises(FormulaError):
+        compile_formula("#REF!+A1").evaluate(SheetModel(2, 2))
+    assert move_references("#REF!+A3", 0, 0, 2) == "#REF!+A5"
+
+
+def test_structure_changes_after_a_deleted_reference(model):
+    changed, removed = model.delete_rows(2, 1)
+    assert model.get_function(0, 2) == "A2+#REF!"
+    model.recalculate_cells([], changed)
+    assert model.get_text(0, 2) == "Error"
+    assert model.get_text(1, 2) == "130"
+
+    model.insert_rows(0, 1)
+    assert model.get_function(1, 2) == "A3+#REF!"
+    model.delete_rows(0, 1)
+    model.insert_columns(0, 1)
+    model.delete_columns(0, 1)
+    model.insert_rows(2, 1)
+    model.restore_cells(removed)
+    model.recalculate_all()
+    assert model.get_function(0, 2) == "A2+B3"
+    assert model.get_text(0, 2) == "31"
+    assert model.get_text(1, 2) == "150"
+
+
+def test_structure_changes_with_a_formula_that_cannot_be_tokenized(model):
+    model.set_function(5, 1, "A1 & B6")
+    model.evaluate(5, 1)
+    assert model.get_text(5, 1) == "Error"
+
+    model.insert_rows(model.rows, 1)
+    assert model.rows == 7
+    model.insert_rows(0, 2)
+    assert model.get_function(7, 1) == "A3 & B8"
+    changed, removed = model.delete_columns(0, 1)
+    assert model.get_function(7, 0) == "#REF! & A8"
+    assert model.cols == 2
+    model.insert_columns(0, 1)
+    model.restore_cells(removed)
+    assert model.get_function(7, 1) == "A3 & B8"
+
+
+@pytest.mark.parametrize("axis, index, count, expected", [(0, 2, 3, "SUM(A1:B8) + C9"), (0, 0, -1, "SUM(A1:B4) + C5"),
+                                                          (0, 1, -4, "SUM(A1:B1) + C2"),
+                                                          (1, 0, -2, "SUM(#REF!) + A6"), (1, 1, 1, "SUM(A1:C5) + D6")])
+def test_references_move_with_the_cells(axis, index, count, expected):
+    assert move_references("SUM(A1:B5) + C6", axis, index, count) == expected
+
+
+def test_bulk_changes_move_numbers_text_and_styles(model):
+    model.set_text(4, 1, "label")
+    model.set_style(4, 1, model.style_table.derive(0, weight="bold"))
+    model.insert_rows(1, 3)
+    assert model.rows == 9
+    assert model.get_text(7, 1) == "label" and model.get_style(7, 1) != 0
+    assert model.get_text(4, 0) == "10" and model.get_text(2, 0) == ""
+    assert model.get_function(0, 2) == "A5+B6"
+    model.delete_columns(0, 1)
+    assert model.get_text(7, 0) == "label"
+    assert model.get_function(0, 1) == "#REF!+A6"
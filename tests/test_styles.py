@@ -0,0 +1,22 @@
+from styles import DEFAULT_STYLE, StyleTable
+
+
+def test_equal_styles_share_one_id():
+    table = StyleTable()
+    bold = table.derive(StyleTable.DEFAULT, weight="bold")
+    assert table.derive(StyleTable.DEFAULT, weight="bold") == bold
+    assert table.intern(dict(DEFAULT_STYLE._asdict(), weight="bold")) == bold
+    assert table.derive(bold, weight="normal") == StyleTable.DEFAULT
+    assert len(table) == 2
+    assert table.get(bold).weight == "bold"
+
+
+def test_cells_with_the_default_style_hold_nothing(make_model):
+    model = make_model([["1", "2"]])
+    red = model.style_table.derive(StyleTable.DEFAULT, fg="red")
+    model.set_style(0, 0, red)
+    model.set_style(0, 1, red)
+    assert model.styles == {(0, 0): red, (0, 1): red}
+    model.set_style(0, 0, StyleTable.DEFAULT)
+    assert model.styles == {(0, 1): red}
+    assert model.get_style(0, 0) == StyleTable.DEFAULT
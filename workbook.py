@@ -1,8 +1,15 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, font, colorchooser, filedialog
+from tkinter import ttk, messagebox, font, colorchooser, filedialog, simpledialog
 from helper import *
+from coordinates import column_label, cell_name
+from formula import FormulaError
 from improved_cell import ImprovedCell
-from typing import List
+from journal import Journal
+from recalc_scheduler import RecalcScheduler
+from recalc_worker import RecalcWorker
+from selection import Selection, clip
+from profiling import timed, measure
+from sheet_model import SheetModel
 
 
 class Workbook:
@@ -11,39 +18,86 @@ class Workbook:
     """
 
     FRAME_COLOR = "Turquoise"
+    VIEW_WIDTH = 1840
+    VIEW_HEIGHT = 805
+    ROW_HEIGHT = 30
+    COLUMN_WIDTH = 185
+    VISIBLE_ROWS = VIEW_HEIGHT // ROW_HEIGHT
+    VISIBLE_COLUMNS = VIEW_WIDTH // COLUMN_WIDTH
     EXPRESSION_EXAMPLE = ("Example: min(a1 - c23, a2 * 2, b2 + max(ac12 + av2, a13)) - avg(a1, c2) / sum(j23, x34)"
-                          " OR if(A1 <= A2,<True val>,<False val>) OR countif(A1,B15, '>15')")
+                          " OR sum(a1:b10) OR if(A1 <= A2,<True val>,<False val>) OR countif(A1,B15, '>15')")
 
-    def __init__(self, root, data):
+    def __init__(self, root, data, chunks=None):
         """
         Initializes a Workbook object.
 
         :param root: The root tkinter object.
         :param data: The initial data for the workbook.
+        :param chunks: An iterator of further row chunks to append in the background, or None.
         """
         self.root = root
-        self.build_new_workbook(data)
+        self.build_new_workbook(data, chunks)
 
-    def build_new_workbook(self, data):
+    def build_new_workbook(self, data, chunks=None):
         """
         Builds a new workbook with the provided data.
 
         :param data: The initial data for the workbook.
+        :param chunks: An iterator of further row chunks to append in the background, or None.
         :return: None
         """
-        self.data = data
-        self.rows = 8 if len(data) < 2 else len(data)
-        self.cols = 8 if len(data[0]) == 0 else len(data[0])
+        rows = 8 if len(data) < 2 else len(data)
+        cols = 8 if len(data[0]) == 0 else len(data[0])
+        self.model = SheetModel.from_data(data, rows, cols)
+        if self.model.load_formulas():
+            self.model.recalculate_all()
+        self.journal = Journal()
+        if getattr(self, "scheduler", None):
+            self.scheduler.cancel()
+            self.worker.stop()
+        self.scheduler = RecalcScheduler(self.root, self.recalculate_cells)
+        self.worker = RecalcWorker()
+        self.polling = False
+        self.on_focus_text: ImprovedCell = None
+        self.start_cell = None
+        self.selection = Selection()
+        self.top_row = 0
+        self.left_column = 0
         self.build_workbook_canvas()
         self.build_sheet_frame()
         self.build_sheet()
         self.fill_sheet()
         self.rows_columns_buttons()
         self.add_functions_options()
-        self.on_focus_text: ImprovedCell = None
-        self.start_entry = None
-        self.selected_cells: List[ImprovedCell] = []
         self.add_font_buttons()
+        if chunks:
+            self.root.after_idle(self.load_next_chunk, chunks, self.model)
+
+    @timed("load_next_chunk")
+    def load_next_chunk(self, chunks, model):
+        """
+        Appends the next chunk of rows of a file being loaded, then schedules the following one.
+
+        :param chunks: The iterator of row chunks.
+        :param model: The model the chunks belong to; loading stops if another workbook was opened since.
+        :return: None
+        """
+        if model is not self.model:
+            return
+        chunk = next(chunks, None)
+        if chunk is None:
+            self.model.load_formulas()
+            if self.model.functions:
+                self.model.recalculate_all()
+            self.render()
+            return
+        self.model.append_rows(chunk)
+        while len(self.sheet) < min(self.model.rows, Workbook.VISIBLE_ROWS):
+            self.add_pool_row()
+        while len(self.column_labels) < min(self.model.cols, Workbook.VISIBLE_COLUMNS):
+            self.add_pool_column()
+        self.render()
+        self.root.after(1, self.load_next_chunk, chunks, model)
 
     def build_workbook_canvas(self):
         """
@@ -62,28 +116,73 @@ class Workbook:
         """
         Builds the frame for the sheet within the workbook canvas.
 
+        The scrollbars move the window of the sheet shown by the widget pool instead of scrolling the canvas.
+
         :return: None
         """
         self.first_canvas = tk.Canvas(self.canvas, bg=Workbook.FRAME_COLOR, highlightthickness=0)
-        self.first_canvas.place(x=41, y=252, height=805, width=1840)
-        self.y_scrollbar = tk.Scrollbar(self.canvas, command=self.first_canvas.yview)
+        self.first_canvas.place(x=41, y=252, height=Workbook.VIEW_HEIGHT, width=Workbook.VIEW_WIDTH)
+        self.y_scrollbar = tk.Scrollbar(self.canvas, command=self.yview)
         self.y_scrollbar.place(x=1897, y=255, height=800)
-        self.x_scrollbar = tk.Scrollbar(self.canvas, command=self.first_canvas.xview, orient=tk.HORIZONTAL)
+        self.x_scrollbar = tk.Scrollbar(self.canvas, command=self.xview, orient=tk.HORIZONTAL)
         self.x_scrollbar.place(x=40, y=1060, width=1840)
-        self.first_canvas.configure(yscrollcommand=self.y_scrollbar.set, xscrollcommand=self.x_scrollbar.set)
         self.sheet_frame = tk.Frame(self.first_canvas, bg=Workbook.FRAME_COLOR, highlightthickness=0)
-        self.sheet_frame.place(x=0, y=0, height=805, width=1840)
+        self.sheet_frame.place(x=0, y=0, height=Workbook.VIEW_HEIGHT, width=Workbook.VIEW_WIDTH)
         self.first_canvas.create_window((0, 0), window=self.sheet_frame, anchor=tk.NW)
-        self.sheet_frame.bind("<Configure>", self.reset_scrollregion)
 
-    def reset_scrollregion(self, event):
+    def yview(self, *args):
+        """
+        Scrolls the visible rows of the sheet (command of the vertical scrollbar).
+
+        :param args: The scrollbar arguments ("moveto", fraction) or ("scroll", count, "units" or "pages").
+        :return: None
+        """
+        self.top_row = self.scroll_target(args, self.top_row, self.model.rows, len(self.sheet))
+        self.render()
+
+    def xview(self, *args):
+        """
+        Scrolls the visible columns of the sheet (command of the horizontal scrollbar).
+
+        :param args: The scrollbar arguments ("moveto", fraction) or ("scroll", count, "units" or "pages").
+        :return: None
+        """
+        self.left_column = self.scroll_target(args, self.left_column, self.model.cols, len(self.sheet[0]))
+        self.render()
+
+    @staticmethod
+    def scroll_target(args, first, total, visible):
+        """
+        Computes the first visible row or column after a scrollbar command.
+
+        :param args: The scrollbar arguments.
+        :param first: The current first visible row or column.
+        :param total: The number of rows or columns in the sheet.
+        :param visible: The number of visible rows or columns.
+        :return: The new first visible row or column.
         """
-        Resets the scroll region for the canvas based on the size of the sheet frame.
+        if args[0] == "moveto":
+            first = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            first += int(args[1]) * (visible if args[2] == "pages" else 1)
+        return max(0, min(first, total - visible))
+
+    def on_mouse_wheel(self, event):
+        """
+        Scrolls the sheet with the mouse wheel (Shift scrolls horizontally).
 
         :param event: The event triggering the function.
         :return: None
         """
-        self.first_canvas.configure(scrollregion=self.first_canvas.bbox("all"))
+        if event.num == 4 or event.delta > 0:
+            step = -3
+        else:
+            step = 3
+        if event.state & 0x1:
+            self.xview("scroll", step, "units")
+        else:
+            self.yview("scroll", step, "units")
+        return "break"
 
     def buttons_workbook_page(self, event):
         """
@@ -112,22 +211,72 @@ class Workbook:
         else:
             self.canvas.config(cursor="")
 
+    @timed("build_sheet")
     def build_sheet(self):
         """
         Builds the sheet (grid of cells) within the workbook canvas.
 
+        Only the cells that fit in the visible area get a widget; the widgets are rebound to other
+        cells of the model as the sheet is scrolled (see render).
+
         :return: None
         """
         self.add_separators()
         self.sheet = []
-        for i in range(self.rows):
-            row = []
-            self.add_row_number_label(i + 1)
-            for j in range(self.cols):
-                self.add_column_letters_label(j + 2)
-                entry = self.build_text(i + 1, j + 2)
-                row.append(entry)
-            self.sheet.append(row)
+        self.row_labels = []
+        self.column_labels = []
+        for i in range(min(self.model.rows, Workbook.VISIBLE_ROWS)):
+            self.add_pool_row()
+        for j in range(min(self.model.cols, Workbook.VISIBLE_COLUMNS)):
+            self.add_pool_column()
+
+    def add_pool_row(self):
+        """
+        Adds a row of widgets to the widget pool.
+
+        :return: None
+        """
+        i = len(self.sheet) + 1
+        self.row_labels.append(self.add_row_number_label(i))
+        self.sheet.append([self.build_text(i, j + 2) for j in range(len(self.column_labels))])
+        self.v_separator.grid_configure(rowspan=len(self.sheet) + 1)
+
+    def remove_pool_row(self):
+        """
+        Removes the last row of widgets from the widget pool.
+
+        :return: None
+        """
+        self.row_labels.pop().destroy()
+        for cell_object in self.sheet.pop():
+            if cell_object is self.on_focus_text:
+                self.on_focus_text = None
+            cell_object.get_cell().destroy()
+        self.v_separator.grid_configure(rowspan=len(self.sheet) + 1)
+
+    def add_pool_column(self):
+        """
+        Adds a column of widgets to the widget pool.
+
+        :return: None
+        """
+        j = len(self.column_labels) + 2
+        self.column_labels.append(self.add_column_letters_label(j))
+        for i, row in enumerate(self.sheet):
+            row.append(self.build_text(i + 1, j))
+
+    def remove_pool_column(self):
+        """
+        Removes the last column of widgets from the widget pool.
+
+        :return: None
+        """
+        self.column_labels.pop().destroy()
+        for row in self.sheet:
+            cell_object = row.pop()
+            if cell_object is self.on_focus_text:
+                self.on_focus_text = None
+            cell_object.get_cell().destroy()
 
     def add_separators(self):
         """
@@ -138,28 +287,34 @@ class Workbook:
         styl = ttk.Style()
         styl.configure('TSeparator', background='black')
         self.v_separator = ttk.Separator(self.sheet_frame, orient=tk.VERTICAL, style='black.TSeparator')
-        self.v_separator.grid(column=1, row=1, rowspan=self.rows + 1, sticky=tk.NS, padx=5)
+        self.v_separator.grid(column=1, row=1, rowspan=1, sticky=tk.NS, padx=5)
 
     def add_row_number_label(self, i):
         """
         Adds row number labels to the sheet frame.
 
         :param i: The row number.
-        :return: None
+        :return: The created Label widget.
         """
         label = tk.Label(self.sheet_frame, text=str(i), bg=Workbook.FRAME_COLOR, font=("Arial", 12, "bold"))
         label.grid(row=i, column=0)
+        label.bind("<Button-3>", lambda event: self.show_structure_menu(event, 0, self.top_row + i - 1))
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            label.bind(sequence, self.on_mouse_wheel)
+        return label
 
     def add_column_letters_label(self, j):
         """
         Adds column letter labels to the sheet frame.
 
         :param j: The column number.
-        :return: None
+        :return: The created Label widget.
         """
-        label = tk.Label(self.sheet_frame, text=number_to_excel_column(j-1),
+        label = tk.Label(self.sheet_frame, text=column_label(j - 2),
                          bg=Workbook.FRAME_COLOR, font=("Arial", 12, "bold"))
         label.grid(row=0, column=j)
+        label.bind("<Button-3>", lambda event: self.show_structure_menu(event, 1, self.left_column + j - 2))
+        return label
 
     def build_text(self, i, j):
         """
@@ -169,34 +324,243 @@ class Workbook:
         :param j: The column index.
         :return: The created ImprovedCell object.
         """
-        cell_object = ImprovedCell(self.sheet_frame, i-1, j-2)
+        cell_object = ImprovedCell(self.sheet_frame, self.top_row + i - 1, self.left_column + j - 2,
+                                   self.model.style_table)
         entry = cell_object.get_cell()
         entry.configure(width=16)
-        cell_object.set_font("Arial", 14)
         entry.grid(row=i, column=j)
         entry.config(highlightthickness=2, highlightbackground="white")
         entry.bind("<FocusIn>", lambda event: self.on_focus_in(event, cell_object))
-        entry.bind("<KeyRelease>", self.on_cell_change)
+        entry.bind("<KeyRelease>", lambda event: self.on_cell_change(event, cell_object))
         entry.bind("<Button-1>", lambda event: self.on_click(event, cell_object))
-        entry.bind("<B1-Motion>", lambda event: self.on_drag(event, cell_object, i-1, j-2))
+        entry.bind("<Control-Button-1>", lambda event: self.on_click(event, cell_object, add=True))
+        entry.bind("<B1-Motion>", lambda event: self.on_drag(event, cell_object))
         entry.bind("<ButtonRelease-1>", lambda event: self.on_release(event, cell_object))
+        entry.bind("<Control-z>", self.undo)
+        entry.bind("<Control-y>", self.redo)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            entry.bind(sequence, self.on_mouse_wheel)
         return cell_object
 
-    def on_cell_change(self, event):
+    @timed("render")
+    def render(self):
+        """
+        Rebinds the widget pool to the visible window of the model and shows the text and style of each cell.
+
+        :return: None
+        """
+        for j, label in enumerate(self.column_labels):
+            label.configure(text=column_label(self.left_column + j))
+        for i, label in enumerate(self.row_labels):
+            label.configure(text=str(self.top_row + i + 1))
+        for i, row in enumerate(self.sheet):
+            for j, cell_object in enumerate(row):
+                model_row, model_column = self.top_row + i, self.left_column + j
+                if (cell_object.row, cell_object.column) != (model_row, model_column):
+                    cell_object.bind_to(model_row, model_column)
+                    if cell_object is self.on_focus_text:
+                        self.cell_label.configure(text=cell_object.get_coord_name())
+                cell_object.set_text(self.model.get_text(model_row, model_column))
+                cell_object.set_style(self.model.get_style(model_row, model_column))
+                self.highlight(cell_object, (model_row, model_column) in self.selection)
+        self.update_scrollbars()
+
+    def update_scrollbars(self):
+        """
+        Updates the scrollbar sliders to the visible window of the sheet.
+
+        :return: None
+        """
+        self.y_scrollbar.set(self.top_row / self.model.rows, (self.top_row + len(self.sheet)) / self.model.rows)
+        self.x_scrollbar.set(self.left_column / self.model.cols,
+                             (self.left_column + len(self.sheet[0])) / self.model.cols)
+
+    def get_cell_widget(self, i, j):
+        """
+        Retrieves the widget currently showing a cell of the model.
+
+        :param i: The row index of the cell.
+        :param j: The column index of the cell.
+        :return: The ImprovedCell object showing the cell, or None if the cell is not visible.
+        """
+        i -= self.top_row
+        j -= self.left_column
+        if 0 <= i < len(self.sheet) and 0 <= j < len(self.sheet[0]):
+            return self.sheet[i][j]
+        return None
+
+    @staticmethod
+    def highlight(cell_object, selected):
+        """
+        Draws or clears the selection border of a cell widget.
+
+        :param cell_object: The ImprovedCell object.
+        :param selected: Whether the cell is selected.
+        :return: None
+        """
+        cell_object.get_cell().config(highlightthickness=2, highlightbackground="black" if selected else "white")
+
+    def redraw_selection(self, rectangles):
+        """
+        Redraws the selection border of the visible cells of some rectangles (the cells whose selection changed).
+
+        :param rectangles: A list of (first_row, first_column, last_row, last_column) tuples.
+        :return: None
+        """
+        window = (self.top_row, self.left_column,
+                  self.top_row + len(self.sheet) - 1, self.left_column + len(self.sheet[0]) - 1)
+        for rectangle in rectangles:
+            visible = clip(rectangle, window)
+            if visible is None:
+                continue
+            first_row, first_column, last_row, last_column = visible
+            for i in range(first_row, last_row + 1):
+                row = self.sheet[i - self.top_row]
+                for j in range(first_column, last_column + 1):
+                    self.highlight(row[j - self.left_column], (i, j) in self.selection)
+
+    @timed("on_cell_change")
+    def on_cell_change(self, event, cell_object):
         """
         Handles cell changes in the sheet.
 
         :param event: The event triggering the function.
+        :param cell_object: The ImprovedCell object representing the changed cell.
         :return: None
         """
-        for row in self.sheet:
-            for cell in row:
-                if cell.get_function():
-                    solution = self.get_function_sol(cell.get_function())
-                    if solution is None:
-                        solution = "Error"
-                    cell.get_cell().delete(0, tk.END)
-                    cell.get_cell().insert(0, solution)
+        row, column = cell_object.row, cell_object.column
+        old_text, new_text = self.model.get_text(row, column), cell_object.get_cell().get()
+        if new_text == old_text:
+            return
+        self.model.set_text(row, column, new_text)
+        self.journal.record(row, column, "text", old_text, new_text, typing=True)
+        self.scheduler.mark_dirty(row, column)
+
+    def undo(self, event=None):
+        """
+        Undoes the last change made to the workbook (a run of typing, a function, a fill or a style change).
+
+        :param event: The event that triggered the undo action.
+        :return: "break", so the key is not handled by the cell.
+        """
+        self.apply_changes(self.journal.undo())
+        return "break"
+
+    def redo(self, event=None):
+        """
+        Redoes the last undone change made to the workbook.
+
+        :param event: The event that triggered the redo action.
+        :return: "break", so the key is not handled by the cell.
+        """
+        self.apply_changes(self.journal.redo())
+        return "break"
+
+    def apply_changes(self, changes):
+        """
+        Applies changes taken from the journal to the model, then recalculates and shows the changed cells.
+
+        :param changes: A list of (row, column, kind, value) tuples.
+        :return: None
+        """
+        if not changes:
+            return
+        changed = []
+        formulas = None
+        for row, column, kind, value in changes:
+            if kind == "text":
+                self.model.set_text(row, column, value)
+                changed.append((row, column))
+            elif kind == "function":
+                if value:
+                    self.model.set_function(row, column, value)
+                    self.scheduler.mark_dirty(row, column, formula=True)
+                else:
+                    self.model.clear_function(row, column)
+            elif kind == "style":
+                self.model.set_style(row, column, value)
+            elif kind in ("rows", "columns"):
+                axis = 0 if kind == "rows" else 1
+                size, restore = value if isinstance(value, tuple) else (value, None)
+                count = size - (self.model.rows if axis == 0 else self.model.cols)
+                formulas = (formulas or []) + self.resize_sheet(axis, (row, column)[axis], count, restore)[0]
+        for row, column in changed:
+            self.scheduler.mark_dirty(row, column)
+        if formulas is None:
+            self.render()
+        else:
+            self.relayout(formulas)
+
+    @timed("recalculate_cells")
+    def recalculate_cells(self, cells, formulas=()):
+        """
+        Starts recalculating the formulas that depend (directly or transitively) on changed cells in the background.
+
+        Called by the recalculation scheduler once a burst of edits is over.
+
+        :param cells: The (row, column) of the changed cells.
+        :param formulas: Formula cells to recalculate themselves as well (e.g. just submitted).
+        :return: None
+        """
+        self.worker.submit(self.model, cells, formulas)
+        self.status_label.configure(text="calculating\u2026")
+        if not self.polling:
+            self.polling = True
+            self.root.after(RecalcWorker.POLL_DELAY, self.poll_recalculation)
+
+    def poll_recalculation(self):
+        """
+        Applies the results of the background recalculation once they are ready, polling again until then.
+
+        :return: None
+        """
+        latest = self.worker.collect()
+        if latest:
+            self.apply_results(*latest)
+        if self.worker.busy():
+            self.root.after(RecalcWorker.POLL_DELAY, self.poll_recalculation)
+        else:
+            self.polling = False
+
+    def finish_recalculation(self):
+        """
+        Runs the pending recalculation and waits for its results (before the values of the sheet are read).
+
+        :return: None
+        """
+        self.scheduler.flush()
+        latest = self.worker.wait()
+        if latest:
+            self.apply_results(*latest)
+
+    @timed("apply_results")
+    def apply_results(self, results, failed):
+        """
+        Stores the results of a background recalculation in the model and shows the visible ones.
+
+        :param results: A list of (row, column, text) tuples.
+        :param failed: Whether any of the formulas failed.
+        :return: None
+        """
+        for i, j, text in results:
+            self.model.set_text(i, j, text)
+            self.update_cell_text(i, j)
+        self.status_label.configure(text="")
+        if failed:
+            messagebox.showwarning("Invalid Expression", "Please enter a valid expression")
+
+    @timed("update_cell_text")
+    def update_cell_text(self, i, j):
+        """
+        Shows the text stored in the model for a cell in its Entry widget, if the cell is visible.
+
+        :param i: The row index of the cell.
+        :param j: The column index of the cell.
+        :return: None
+        """
+        cell_object = self.get_cell_widget(i, j)
+        if cell_object:
+            cell_object.set_text(self.model.get_text(i, j))
 
     def on_focus_in(self, event, entry):
         """
@@ -207,12 +571,14 @@ class Workbook:
         :return: None
         """
         self.on_focus_text = entry
+        self.journal.seal()
         self.cell_label.configure(text=entry.get_coord_name())
         self.selected_font.set(self.on_focus_text.get_font().cget("family"))
         self.selected_size.set(self.on_focus_text.get_font().cget("size"))
-        if entry.get_function():
+        function = self.model.get_function(entry.row, entry.column)
+        if function:
             self.expression.delete(0, 'end')
-            self.expression.insert(0, entry.get_function())
+            self.expression.insert(0, function)
 
     def rows_columns_buttons(self):
         """
@@ -233,14 +599,7 @@ class Workbook:
 
         :return: None
         """
-        self.rows += 1
-        self.add_row_number_label(self.rows)
-        row = []
-        for j in range(self.cols):
-            text = self.build_text(self.rows, j + 2)
-            row.append(text)
-        self.sheet.append(row)
-        self.v_separator.grid_configure(rowspan=self.rows)
+        self.try_structure_change(0, self.model.rows, 1)
 
     def build_column(self):
         """
@@ -248,11 +607,119 @@ class Workbook:
 
         :return: None
         """
-        self.cols += 1
-        self.add_column_letters_label(self.cols+1)
-        for i in range(self.rows):
-            text = self.build_text(i + 1, self.cols+1)
-            self.sheet[i].append(text)
+        self.try_structure_change(1, self.model.cols, 1)
+
+    def show_structure_menu(self, event, axis, index):
+        """
+        Shows the menu for inserting and deleting rows or columns at a row number or column letter label.
+
+        :param event: The event triggering the function.
+        :param axis: 0 for a row number label, 1 for a column letter label.
+        :param index: The row or column index of the label.
+        :return: None
+        """
+        if index >= (self.model.rows if axis == 0 else self.model.cols):
+            return
+        before, after = ("above", "below") if axis == 0 else ("left", "right")
+        name = "rows" if axis == 0 else "columns"
+        menu = tk.Menu(self.root, tearoff=0)
+        menu.add_command(label="Insert " + name + " " + before + "...",
+                         command=lambda: self.ask_structure_change(axis, index, 1))
+        menu.add_command(label="Insert " + name + " " + after + "...",
+                         command=lambda: self.ask_structure_change(axis, index + 1, 1))
+        menu.add_command(label="Delete " + name + "...", command=lambda: self.ask_structure_change(axis, index, -1))
+        menu.tk_popup(event.x_root, event.y_root)
+
+    def ask_structure_change(self, axis, index, sign):
+        """
+        Asks how many rows or columns to insert or delete, then changes the sheet.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param sign: 1 to insert, -1 to delete.
+        :return: None
+        """
+        name = "rows" if axis == 0 else "columns"
+        title = ("Insert " if sign > 0 else "Delete ") + name.capitalize()
+        count = simpledialog.askinteger(title, "Number of " + name + ":", initialvalue=1, minvalue=1,
+                                        parent=self.root)
+        if count:
+            self.try_structure_change(axis, index, sign * count)
+
+    def try_structure_change(self, axis, index, count):
+        """
+        Inserts or deletes rows or columns, showing why if the sheet can't be changed.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param count: The number of rows or columns to insert, or minus the number of rows or columns to delete.
+        :return: None
+        """
+        try:
+            self.change_structure(axis, index, count)
+        except IndexError as error:
+            messagebox.showwarning("Failed", str(error))
+
+    @timed("change_structure")
+    def change_structure(self, axis, index, count):
+        """
+        Inserts or deletes rows or columns as one undoable operation: the cells after them move, every formula
+        referencing a moved cell is rewritten, and the sheet is recalculated and laid out once.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param count: The number of rows or columns to insert, or minus the number of rows or columns to delete.
+        :return: None
+        """
+        size = self.model.rows if axis == 0 else self.model.cols
+        changed, removed = self.resize_sheet(axis, index, count)
+        row, column = (index, 0) if axis == 0 else (0, index)
+        self.journal.record(row, column, "rows" if axis == 0 else "columns",
+                            size if removed is None else (size, removed), size + count)
+        self.relayout(changed)
+
+    def resize_sheet(self, axis, index, count, restore=None):
+        """
+        Inserts or deletes rows or columns in the model, once the recalculation in progress is done.
+
+        :param axis: 0 for rows, 1 for columns.
+        :param index: The index of the first inserted or deleted row or column.
+        :param count: The number of rows or columns to insert, or minus the number of rows or columns to delete.
+        :param restore: The cells to put back in the inserted rows or columns (when a deletion is undone).
+        :return: A tuple (changed, removed): the formula cells to recalculate, and the cells lost by a deletion
+                 (None for an insertion).
+        """
+        self.finish_recalculation()
+        self.redraw_selection(self.selection.clear())
+        self.start_cell = None
+        if count > 0:
+            changed = (self.model.insert_rows if axis == 0 else self.model.insert_columns)(index, count)
+            if restore:
+                changed += self.model.restore_cells(restore)
+            return changed, None
+        return (self.model.delete_rows if axis == 0 else self.model.delete_columns)(index, -count)
+
+    def relayout(self, formulas):
+        """
+        Fits the widget pool to the size of the sheet, recalculates changed formulas and renders the sheet once.
+
+        :param formulas: The formula cells to recalculate, with their dependents.
+        :return: None
+        """
+        while len(self.sheet) < min(self.model.rows, Workbook.VISIBLE_ROWS):
+            self.add_pool_row()
+        while len(self.sheet) > self.model.rows:
+            self.remove_pool_row()
+        while len(self.column_labels) < min(self.model.cols, Workbook.VISIBLE_COLUMNS):
+            self.add_pool_column()
+        while len(self.column_labels) > self.model.cols:
+            self.remove_pool_column()
+        self.top_row = max(0, min(self.top_row, self.model.rows - len(self.sheet)))
+        self.left_column = max(0, min(self.left_column, self.model.cols - len(self.column_labels)))
+        for row, column in formulas:
+            self.scheduler.mark_dirty(row, column, formula=True)
+        self.scheduler.flush()
+        self.render()
 
     def add_functions_options(self):
         """
@@ -260,7 +727,7 @@ class Workbook:
 
         :return: None
         """
-        self.expression_object = ImprovedCell(self.canvas, 0, 0)
+        self.expression_object = ImprovedCell(self.canvas, 0, 0, self.model.style_table)
         self.expression = self.expression_object.get_cell()
         self.expression.place(x=610, y=145, width=800, height=25)
         self.expression.insert(0, Workbook.EXPRESSION_EXAMPLE)
@@ -272,6 +739,8 @@ class Workbook:
         self.cell_label = tk.Label(self.canvas, text="", font=(
             "Helvetica", 10))
         self.cell_label.place(x=575, y=146, width=33, height=24)
+        self.status_label = tk.Label(self.canvas, text="", font=("Helvetica", 9))
+        self.status_label.place(x=525, y=174, width=83, height=18)
 
         self.submit_im = tk.PhotoImage(file="pictures/submit.png")
         self.delete_im = tk.PhotoImage(file="pictures/delete.png")
@@ -325,26 +794,24 @@ class Workbook:
         """
         if not self.expression.get() or self.expression.cget('state') == 'disabled':
             return
-        solution = self.get_function_sol(self.expression.get())
         if not self.on_focus_text:
             return
-        self.on_focus_text.get_cell().delete(0, tk.END)
-        self.on_focus_text.get_cell().insert(0, solution)
-        self.on_focus_text.set_function(self.expression.get().upper())
+        self.set_cell_function(self.on_focus_text.row, self.on_focus_text.column, self.expression.get().upper())
 
-    def get_function_sol(self, function):
+    def set_cell_function(self, i, j, function):
         """
-        Retrieves the solution for a given function expression.
+        Stores a function in a cell, then recalculates it and the cells depending on it in the background.
 
+        :param i: The row index of the cell.
+        :param j: The column index of the cell.
         :param function: The function expression.
-        :return: The solution for the function expression.
+        :return: None
         """
-        try:
-            solution = solve_expression(function, self.get_sheet_values())
-            return solution
-        except:
-            messagebox.showwarning("Invalid Expression", "Please enter a valid expression")
-            return "Error"
+        with self.journal.transaction("function"):
+            self.journal.record(i, j, "function", self.model.get_function(i, j), function)
+            self.journal.record(i, j, "text", self.model.get_text(i, j), "")
+        self.model.set_function(i, j, function)
+        self.scheduler.mark_dirty(i, j, formula=True)
 
     def delete_button(self):
         """
@@ -355,7 +822,9 @@ class Workbook:
         self.expression.delete(0, 'end')
         if not self.on_focus_text:
             return
-        self.on_focus_text.clear_function()
+        row, column = self.on_focus_text.row, self.on_focus_text.column
+        self.journal.record(row, column, "function", self.model.get_function(row, column), "")
+        self.model.clear_function(row, column)
 
     def function_button(self, function):
         """
@@ -366,64 +835,52 @@ class Workbook:
         """
         cursor_pos = self.expression.index(tk.INSERT)
         cells = ""
-        if len(self.selected_cells) > 1:
-            for cell in self.selected_cells:
-                cells += cell.get_coord_name() + ","
-            cells = cells[:-1]
+        if self.selection and not self.selection.is_single_cell():
+            cells = self.selection.references(cell_name)
         self.expression.insert(cursor_pos, function + "(" + cells + ")")
         cursor_pos = self.expression.index(tk.INSERT)
         self.expression.icursor(cursor_pos-1)
 
+    @timed("get_sheet_values")
     def get_sheet_values(self):
         """
         Retrieves the values from the cells in the sheet.
 
-        :return: A list of lists containing the values from the cells.
+        :return: The SheetModel holding the values of the cells.
         """
-        sheet_values = []
-        for row in self.sheet:
-            row_values = []
-            for entry in row:
-                row_values.append(entry.get_cell().get())
-            sheet_values.append(row_values)
-        return sheet_values
+        return self.model
 
     # ############################### drag extension ####################################
-    def on_click(self, event, cell_object):
+    def on_click(self, event, cell_object, add=False):
         """
         Handles mouse click events on cells in the sheet.
 
         :param event: The event triggering the function.
         :param cell_object: The ImprovedCell object representing the clicked cell.
+        :param add: Whether the click adds a range to the selection (Control-click) instead of starting a new one.
         :return: None
         """
-        for cell in self.selected_cells:
-            cell.get_cell().config(highlightthickness=2, highlightbackground="white")
-        self.selected_cells = []
-        self.start_entry = cell_object
-        self.selected_cells.append(cell_object)
+        cell = (cell_object.row, cell_object.column)
+        self.redraw_selection(self.selection.start(*cell, add=add))
+        if add and self.start_cell:
+            self.highlight(cell_object, True)
+        else:
+            self.start_cell = cell
 
-    def on_drag(self, event, cell_object, i, j):
+    def on_drag(self, event, cell_object):
         """
         Handles cell dragging events in the sheet.
 
         :param event: The event triggering the function.
         :param cell_object: The ImprovedCell object representing the dragged cell.
-        :param i: The row index of the dragged cell.
-        :param j: The column index of the dragged cell.
         :return: None
         """
-        cell_object.get_cell().config(highlightthickness=2, highlightbackground="black")
-        if self.start_entry:
-            try:
-                i += event.y // 30
-                j += event.x // 185
-                if 0 <= i < len(self.sheet) and 0 <= j < len(self.sheet[0]):
-                    if self.sheet[i][j] not in self.selected_cells:
-                        self.sheet[i][j].get_cell().config(highlightthickness=2, highlightbackground="black")
-                        self.selected_cells.append(self.sheet[i][j])
-            except:
-                pass
+        self.highlight(cell_object, True)
+        if self.start_cell:
+            i = min(max(cell_object.row + event.y // Workbook.ROW_HEIGHT, 0), self.model.rows - 1)
+            j = min(max(cell_object.column + event.x // Workbook.COLUMN_WIDTH, 0), self.model.cols - 1)
+            added, removed = self.selection.extend(i, j)
+            self.redraw_selection(added + removed)
 
     def on_release(self, event, cell_object):
         """
@@ -433,38 +890,55 @@ class Workbook:
         :param cell_object: The ImprovedCell object representing the released cell.
         :return: None
         """
-        if not self.start_entry:
+        if not self.start_cell:
             return
-        if self.start_entry.get_function() == "":
+        function = self.model.get_function(*self.start_cell)
+        if function == "":
             return
-        if not self.selected_cells[1:]:
+        if self.selection.is_single_cell():
             return
-        selected_cells = self.get_cells_names(self.selected_cells)
+        selected_cells = self.get_cells_names()
         ans = messagebox.askyesno("Function Addition", "Are you sure you want to add dependent functions to "
                                                  "these cells?\n" + selected_cells)
-        cell_object.get_cell().config(highlightthickness=2, highlightbackground="white")
-        function = self.start_entry.get_function()
-        for cell in self.selected_cells[1:]:
-            if ans:
-                function = get_next_function(function)
-                cell.set_function(function)
-                cell.get_cell().delete(0, tk.END)
-                cell.get_cell().insert(0, self.get_function_sol(function))
-            cell.get_cell().config(highlightthickness=2, highlightbackground="white")
-        self.start_entry = None
-        self.selected_cells = []
-
-    def get_cells_names(self, cells):
-        """
-        Retrieves the names of the selected cells.
-
-        :param cells: List of ImprovedCell objects representing selected cells.
-        :return: A string containing the names of the selected cells.
-        """
-        names = ""
-        for cell in cells[1:]:
-            names += cell.get_coord_name() + ", "
-        return names
+        if ans:
+            self.fill_cells(self.start_cell, [cell for cell in self.selection.cells() if cell != self.start_cell])
+        self.redraw_selection(self.selection.clear())
+        self.start_cell = None
+
+    def fill_cells(self, source, targets):
+        """
+        Fills cells with the function of a source cell, moving its references by the (row, column) offset of each
+        target, then recalculates all the targets as one batch.
+
+        :param source: The (row, column) of the source cell.
+        :param targets: The (row, column) of the cells to fill.
+        :return: None
+        """
+        function = self.model.get_function(*source)
+        outside = []
+        with self.journal.transaction("fill"):
+            for i, j in targets:
+                try:
+                    target_function = shift_formula(function, i - source[0], j - source[1])
+                except FormulaError:
+                    outside.append(cell_name(i, j))
+                    continue
+                self.journal.record(i, j, "function", self.model.get_function(i, j), target_function)
+                self.journal.record(i, j, "text", self.model.get_text(i, j), "")
+                self.model.set_function(i, j, target_function)
+                self.scheduler.mark_dirty(i, j, formula=True)
+        self.scheduler.flush()
+        if outside:
+            messagebox.showwarning("Function Addition", "These cells would reference cells outside the sheet:\n" +
+                                   ", ".join(outside))
+
+    def get_cells_names(self):
+        """
+        Retrieves the names of the selected ranges.
+
+        :return: A string containing the names of the selected ranges (e.g. A1:B3, D4).
+        """
+        return self.selection.references(cell_name).replace(",", ", ")
 
     # ############################### Font Customization ####################################
 
@@ -534,6 +1008,7 @@ class Workbook:
         """
         if self.on_focus_text:
             self.on_focus_text.change_font(self.selected_font.get())
+            self.store_style(self.on_focus_text)
 
     def change_size(self, event):
         """
@@ -544,6 +1019,7 @@ class Workbook:
         """
         if self.on_focus_text:
             self.on_focus_text.change_font_size(self.selected_size.get())
+            self.store_style(self.on_focus_text)
 
     def align_text(self, position):
         """
@@ -554,6 +1030,7 @@ class Workbook:
         """
         if self.on_focus_text:
             self.on_focus_text.align(position)
+            self.store_style(self.on_focus_text)
 
     def customize_font(self, function):
         """
@@ -564,6 +1041,7 @@ class Workbook:
         """
         if self.on_focus_text:
             self.on_focus_text.font_customize(function)
+            self.store_style(self.on_focus_text)
 
     def change_color(self, change):
         """
@@ -576,18 +1054,27 @@ class Workbook:
             color = colorchooser.askcolor(title="Choose Color")
             if color[1]:
                 self.on_focus_text.color_customize(change, color[1])
+                self.store_style(self.on_focus_text)
+
+    def store_style(self, cell_object):
+        """
+        Stores the style ID of a customized cell widget in the model, so it survives scrolling.
 
+        :param cell_object: The ImprovedCell object representing the cell.
+        :return: None
+        """
+        row, column = cell_object.row, cell_object.column
+        self.journal.record(row, column, "style", self.model.get_style(row, column), cell_object.get_style())
+        self.model.set_style(row, column, cell_object.get_style())
+
+    @timed("fill_sheet")
     def fill_sheet(self):
         """
-        Fills the sheet with data from the provided workbook data.
+        Fills the sheet widgets with the data held by the model.
 
         :return: None
         """
-        for i in range(len(self.data)):
-            for j in range(len(self.data[0])):
-                if self.data[i][j]:
-                    self.sheet[i][j].get_cell().delete(0, tk.END)
-                    self.sheet[i][j].get_cell().insert(0, self.data[i][j])
+        self.render()
 
     def open_file(self):
         """
@@ -596,11 +1083,11 @@ class Workbook:
         :return: None
         """
         try:
-            data = open_file()
+            data, chunks = open_file()
             if data[0][0]:
                 pass
             self.canvas.destroy()
-            self.build_new_workbook(data)
+            self.build_new_workbook(data, chunks)
         except:
             messagebox.showwarning("Failed", "Wrong file format")
 
@@ -610,25 +1097,12 @@ class Workbook:
 
         :return: None
         """
-        filetypes = (
-            ("JSON files", "*.json"), ("YAML files", "*.yaml"), ("Excel files", "*.xlsx"),
-            ("CSV files", "*.csv"), ("PDF files", "*.pdf")
-        )
-        data = self.get_sheet_data()
-        filepath = filedialog.asksaveasfilename(title="Save File", filetypes=filetypes, defaultextension=".json")
+        filepath = filedialog.asksaveasfilename(title="Save File", filetypes=get_filetypes(),
+                                                defaultextension=".json")
         if filepath:
+            self.finish_recalculation()
             try:
-                file_type = filepath.split(".")[-1]
-                if file_type == "json":
-                    write_json_file(filepath, data)
-                elif file_type == "yaml":
-                    write_yaml_file(filepath, data)
-                elif file_type == "xlsx":
-                    write_excel_file(filepath, data)
-                elif file_type == "csv":
-                    write_csv_file(filepath, data)
-                elif file_type == "pdf":
-                    write_pdf_file(filepath, data)
+                write_file(filepath, self.model)
                 messagebox.showinfo("Success", "The file has been saved successfully")
             except:
                 messagebox.showwarning("Failed", "Can't save file")
@@ -639,33 +1113,24 @@ class Workbook:
 
         :return: A list of lists containing the data from the cells.
         """
-        data = [[self.sheet[i][j].get_cell().get() for j in range(len(self.sheet[0]))] for i in range(len(self.sheet))]
-        return data
+        return self.model.to_list()
 
 
 def open_file():
     """
     Opens a file dialog for selecting a workbook file to open.
 
-    :return: None
+    Formats with a chunk reader (CSV, Excel, PDF) are streamed: only the first chunk of rows is read here.
+
+    :return: A tuple (data, chunks): the data to show first, and an iterator of the remaining
+             row chunks (or None if the whole file was read).
     """
-    filetypes = (
-        ("JSON files", "*.json"), ("YAML files", "*.yaml"), ("Excel files", "*.xlsx"),
-        ("CSV files", "*.csv"), ("PDF files", "*.pdf")
-    )
-    filepath = filedialog.askopenfilename(title="Open File", filetypes=filetypes)
+    filepath = filedialog.askopenfilename(title="Open File", filetypes=get_filetypes())
     if filepath:
-        data = [[]]
-        file_type = filepath.split(".")[-1]
-        if file_type == "json":
-            data = read_json_file(filepath)
-        elif file_type == "yaml":
-            data = read_yaml_file(filepath)
-        elif file_type == "xlsx":
-            data = read_excel_file(filepath)
-        elif file_type == "csv":
-            data = read_csv_file(filepath)
-        elif file_type == "pdf":
-            data = read_pdf_file(filepath)
-        return data
+        file_format = get_file_format(filepath)
+        with measure("read_file"):
+            if file_format.chunk_reader:
+                chunks = file_format.chunk_reader(filepath)
+                return next(chunks, [[]]), chunks
+            return file_format.reader(filepath), None
 